@@ -0,0 +1,263 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from .constants import CELLS, HEATERS
+
+CELL_PARAMETERS = [
+    "write_current",
+    "read_current",
+    "enable_write_current",
+    "enable_read_current",
+    "slope",
+    "y_intercept",
+    "max_critical_current",
+]
+CURRENT_PARAMETERS = [
+    "write_current",
+    "read_current",
+    "enable_write_current",
+    "enable_read_current",
+    "max_critical_current",
+]
+
+# Assumed half-widths of each cell's operating window around its optimum
+# currents in microamps. Replace with measured values from
+# analysis.operating_window when window maps are available for every cell.
+WINDOW_HALF_WIDTH = {
+    "write_current": 20.0,
+    "read_current": 15.0,
+    "enable_write_current": 15.0,
+    "enable_read_current": 10.0,
+}
+
+BLOCK_SIZE = 2**16
+
+
+def fit_cell_distribution(cells: dict = CELLS) -> dict:
+    """Fit a multivariate normal distribution to the measured cell table.
+
+    Currents are converted to microamps. The covariance keeps the strong
+    correlation between the slope and intercept of the enable response.
+    """
+    samples = np.array(
+        [
+            [
+                cell[name] * 1e6 if name in CURRENT_PARAMETERS else cell[name]
+                for name in CELL_PARAMETERS
+            ]
+            for cell in cells.values()
+        ]
+    )
+    return {
+        "names": CELL_PARAMETERS,
+        "mean": samples.mean(axis=0),
+        "covariance": np.cov(samples, rowvar=False),
+    }
+
+
+def get_heater_spread(heaters: dict = HEATERS) -> float:
+    """Relative spread of the heater resistance shared along a row."""
+    resistance = np.array([heater["resistance_cryo"] for heater in heaters.values()])
+    return resistance.std(ddof=1) / resistance.mean()
+
+
+def get_default_operating_point(cells: dict = CELLS) -> dict:
+    """Median of the measured optimum currents in amps, as in ``CELLS``."""
+    return {
+        name: float(np.median([cell[name] for cell in cells.values()]))
+        for name in WINDOW_HALF_WIDTH
+    }
+
+
+def sample_cells(
+    distribution: dict, num_cells: int, rng: np.random.Generator
+) -> dict:
+    samples = rng.multivariate_normal(
+        distribution["mean"],
+        distribution["covariance"],
+        size=num_cells,
+        method="eigh",
+    )
+    return {name: samples[:, i] for i, name in enumerate(distribution["names"])}
+
+
+def evaluate_cells(
+    cells: dict,
+    operating_point: dict,
+    window: dict = WINDOW_HALF_WIDTH,
+    row_factor: np.ndarray = 1.0,
+    column_factor: np.ndarray = 1.0,
+) -> np.ndarray:
+    """Check which cells operate at a shared operating point.
+
+    Parameters
+    ----------
+    cells : dict
+        Sampled cell parameters in microamps, one array per parameter.
+    operating_point : dict
+        The global currents in amps, keyed like ``CELLS``.
+    window : dict
+        Half-width of each cell's window around its optimum in microamps.
+    row_factor : np.ndarray
+        Scale of the enable currents delivered to each cell's row.
+    column_factor : np.ndarray
+        Scale of the channel currents delivered to each cell's column.
+
+    Returns
+    -------
+    passed : np.ndarray
+        Boolean array, True where the cell writes and reads correctly.
+    """
+    applied = {
+        "write_current": operating_point["write_current"] * 1e6 * column_factor,
+        "read_current": operating_point["read_current"] * 1e6 * column_factor,
+        "enable_write_current": operating_point["enable_write_current"]
+        * 1e6
+        * row_factor,
+        "enable_read_current": operating_point["enable_read_current"]
+        * 1e6
+        * row_factor,
+    }
+    x_intercept = -cells["y_intercept"] / cells["slope"]
+
+    passed = np.ones(len(cells["slope"]), dtype=bool)
+    for name, half_width in window.items():
+        passed &= np.abs(applied[name] - cells[name]) <= half_width
+    passed &= applied["enable_write_current"] < x_intercept
+    passed &= applied["enable_read_current"] < x_intercept
+    passed &= applied["read_current"] < cells["max_critical_current"]
+    return passed
+
+
+def simulate_array(
+    num_rows: int,
+    num_cols: int,
+    operating_point: dict,
+    distribution: dict,
+    num_trials: int = 100,
+    window: dict = WINDOW_HALF_WIDTH,
+    row_sigma: float = 0.0,
+    column_sigma: float = 0.0,
+    seed: Optional[np.random.SeedSequence] = None,
+    block_size: int = BLOCK_SIZE,
+) -> dict:
+    """Monte Carlo trials of one array size.
+
+    Cells are evaluated in blocks so that memory stays bounded for arrays of
+    10^6 cells. Every trial draws new row and column line factors.
+
+    Returns
+    -------
+    result : dict
+        ``cell_yield`` is the fraction of working cells in each trial and
+        ``array_pass`` is True for trials where every cell works.
+    """
+    rng = np.random.default_rng(seed)
+    num_cells = num_rows * num_cols
+    cell_yield = np.zeros(num_trials)
+    array_pass = np.zeros(num_trials, dtype=bool)
+
+    for trial in range(num_trials):
+        row_factor = 1 + row_sigma * rng.standard_normal(num_rows)
+        column_factor = 1 + column_sigma * rng.standard_normal(num_cols)
+        num_passed = 0
+        for start in range(0, num_cells, block_size):
+            index = np.arange(start, min(start + block_size, num_cells))
+            cells = sample_cells(distribution, len(index), rng)
+            passed = evaluate_cells(
+                cells,
+                operating_point,
+                window,
+                row_factor[index // num_cols],
+                column_factor[index % num_cols],
+            )
+            num_passed += np.count_nonzero(passed)
+        cell_yield[trial] = num_passed / num_cells
+        array_pass[trial] = num_passed == num_cells
+
+    return {"cell_yield": cell_yield, "array_pass": array_pass}
+
+
+def _simulate_array_task(args: tuple) -> dict:
+    return simulate_array(*args)
+
+
+def simulate_yield_vs_size(
+    array_sizes: list[int],
+    operating_point: Optional[dict] = None,
+    num_trials: int = 100,
+    window: dict = WINDOW_HALF_WIDTH,
+    row_sigma: Optional[float] = None,
+    column_sigma: float = 0.0,
+    cells: dict = CELLS,
+    seed: int = 0,
+    trials_per_task: int = 10,
+    max_workers: Optional[int] = None,
+) -> dict:
+    """Yield of square arrays versus size, run across a process pool.
+
+    Parameters
+    ----------
+    array_sizes : list[int]
+        Number of rows (and columns) of each simulated array.
+    operating_point : dict, optional
+        The global currents in amps. Defaults to the median cell optimum.
+    num_trials : int
+        Monte Carlo trials per array size, split into pool tasks of
+        ``trials_per_task`` trials.
+    row_sigma : float, optional
+        Relative spread of the row enable currents. Defaults to the spread
+        of the heater resistances in ``HEATERS``.
+
+    Returns
+    -------
+    yield_dict : dict
+        Arrays indexed by size: number of cells, mean and standard deviation
+        of the cell yield, and the fraction of fully working arrays.
+    """
+    if operating_point is None:
+        operating_point = get_default_operating_point(cells)
+    if row_sigma is None:
+        row_sigma = get_heater_spread()
+    distribution = fit_cell_distribution(cells)
+
+    chunks = [
+        (size, min(trials_per_task, num_trials - start))
+        for size in array_sizes
+        for start in range(0, num_trials, trials_per_task)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [
+        (
+            size,
+            size,
+            operating_point,
+            distribution,
+            chunk_trials,
+            window,
+            row_sigma,
+            column_sigma,
+            child,
+        )
+        for (size, chunk_trials), child in zip(chunks, seeds)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_simulate_array_task, tasks))
+
+    cell_yield = {size: [] for size in array_sizes}
+    array_pass = {size: [] for size in array_sizes}
+    for (size, _), result in zip(chunks, results):
+        cell_yield[size].append(result["cell_yield"])
+        array_pass[size].append(result["array_pass"])
+    cell_yield = [np.concatenate(cell_yield[size]) for size in array_sizes]
+    array_pass = [np.concatenate(array_pass[size]) for size in array_sizes]
+
+    return {
+        "array_size": np.asarray(array_sizes),
+        "num_cells": np.asarray(array_sizes) ** 2,
+        "cell_yield": np.array([y.mean() for y in cell_yield]),
+        "cell_yield_std": np.array([y.std() for y in cell_yield]),
+        "array_yield": np.array([p.mean() for p in array_pass]),
+    }
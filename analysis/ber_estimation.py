@@ -0,0 +1,337 @@
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from .confidence import CONFIDENCE_LEVEL, clopper_pearson_interval
+from .data_processing import get_read_voltages
+from .threshold_search import (
+    apply_stacked,
+    count_errors,
+    get_readout_polarity,
+    load_polarities,
+    load_read_voltages,
+    search_optimal_threshold,
+)
+
+# Shots beyond the far quantile of each facing tail, the most extreme
+# quantile that is still resolved
+TAIL_MIN_SHOTS = 10
+# Ratio of the near to the far tail fraction
+TAIL_SPAN = 10
+# Largest near tail fraction, about one standard deviation from the centre
+TAIL_MAX_FRACTION = 0.16
+# Counted errors less likely than this under the extrapolation reject it
+CONSISTENCY_LEVEL = 1e-3
+# Decades below one error in all shots the extrapolation is trusted to
+EXTRAPOLATION_DECADES = 3
+NUM_BOOTSTRAP = 200
+# Bootstrap resamples evaluated per batch, bounds the temporary memory
+BOOTSTRAP_BATCH = 25
+
+
+def get_tail_fractions(num_shots: int) -> Tuple[float, float]:
+    """Near and far facing-tail fractions that ``num_shots`` can resolve."""
+    far = TAIL_MIN_SHOTS / num_shots
+    near = min(TAIL_SPAN * far, TAIL_MAX_FRACTION)
+    return near, min(far, near / 2)
+
+
+def get_extrapolation_floor(num_shots: int) -> float:
+    """Smallest rate the tail extrapolation reports for ``num_shots`` shots."""
+    return 10.0**-EXTRAPOLATION_DECADES / num_shots
+
+
+def fit_tail_gaussians(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> dict:
+    """Gaussians matching the facing tails of the read 0 and read 1 voltages.
+
+    Only the tail of each distribution facing the other one causes bit
+    errors, and it is rarely as narrow as the core. Each tail is fitted
+    through two of its quantiles, the near and far ones from
+    ``get_tail_fractions``, so the Gaussian reproduces the tail itself.
+    Read 1 is the higher voltage unless ``invert`` is set, the polarity of
+    ``count_errors``. Shots are along the last axis.
+
+    Returns
+    -------
+    fit : dict
+        ``mean0``, ``sigma0``, ``mean1`` and ``sigma1`` with the shape of
+        the leading axes. The means are those of the tail Gaussians, not
+        the centres of the distributions.
+    """
+    from scipy.special import ndtri
+
+    num_shots = min(read_zero.shape[-1], read_one.shape[-1])
+    near, far = get_tail_fractions(num_shots)
+    z_near, z_far = ndtri(1 - near), ndtri(1 - far)
+    quantiles = [far, near, 1 - near, 1 - far]
+    low_far0, low_near0, high_near0, high_far0 = np.quantile(
+        read_zero, quantiles, axis=-1
+    )
+    low_far1, low_near1, high_near1, high_far1 = np.quantile(
+        read_one, quantiles, axis=-1
+    )
+
+    ascending = ~np.broadcast_to(np.asarray(invert, dtype=bool), low_far0.shape)
+    near0 = np.where(ascending, high_near0, low_near0)
+    far0 = np.where(ascending, high_far0, low_far0)
+    near1 = np.where(ascending, low_near1, high_near1)
+    far1 = np.where(ascending, low_far1, high_far1)
+
+    tiny = np.finfo(float).tiny
+    sigma0 = np.maximum(np.abs(far0 - near0) / (z_far - z_near), tiny)
+    sigma1 = np.maximum(np.abs(far1 - near1) / (z_far - z_near), tiny)
+    direction = np.where(ascending, 1.0, -1.0)
+    return {
+        "mean0": near0 - direction * sigma0 * z_near,
+        "sigma0": sigma0,
+        "mean1": near1 + direction * sigma1 * z_near,
+        "sigma1": sigma1,
+    }
+
+
+def gaussian_threshold(
+    mean0: np.ndarray, sigma0: np.ndarray, mean1: np.ndarray, sigma1: np.ndarray
+) -> np.ndarray:
+    """Threshold between the means where both Gaussian densities are equal.
+
+    This minimises the sum of the two error probabilities.
+    """
+    midpoint = (mean0 * sigma1 + mean1 * sigma0) / (sigma0 + sigma1)
+    # Tails narrower than the voltage resolution overflow, use the midpoint
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        a = 1 / sigma0**2 - 1 / sigma1**2
+        b = -2 * (mean0 / sigma0**2 - mean1 / sigma1**2)
+        c = mean0**2 / sigma0**2 - mean1**2 / sigma1**2 + 2 * np.log(sigma0 / sigma1)
+        root = np.sqrt(b**2 - 4 * a * c)
+        roots = np.stack([(-b + root) / (2 * a), (-b - root) / (2 * a)])
+        linear = -c / b
+
+        low = np.minimum(mean0, mean1)
+        high = np.maximum(mean0, mean1)
+        between = (roots >= low) & (roots <= high)
+        quadratic = np.where(
+            between[0], roots[0], np.where(between[1], roots[1], midpoint)
+        )
+        threshold = np.where(np.abs(a) * (high - low) ** 2 < 1e-12, linear, quadratic)
+    return np.where(np.isfinite(threshold), threshold, midpoint)
+
+
+def gaussian_error_probabilities(
+    threshold: np.ndarray,
+    mean0: np.ndarray,
+    sigma0: np.ndarray,
+    mean1: np.ndarray,
+    sigma1: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Write 0 read 1 and write 1 read 0 tail probabilities at a threshold."""
+    from scipy.special import ndtr
+
+    direction = np.where(invert, -1.0, 1.0)
+    w0r1 = ndtr(-direction * (threshold - mean0) / sigma0)
+    w1r0 = ndtr(-direction * (mean1 - threshold) / sigma1)
+    return w0r1, w1r0
+
+
+def gaussian_bit_error_rate(
+    threshold: np.ndarray,
+    mean0: np.ndarray,
+    sigma0: np.ndarray,
+    mean1: np.ndarray,
+    sigma1: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> np.ndarray:
+    """Mean of the write 0 read 1 and write 1 read 0 tail probabilities."""
+    w0r1, w1r0 = gaussian_error_probabilities(
+        threshold, mean0, sigma0, mean1, sigma1, invert
+    )
+    return 0.5 * (w0r1 + w1r0)
+
+
+def _tail_fit_ber(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> Tuple[np.ndarray, np.ndarray, dict]:
+    fit = fit_tail_gaussians(read_zero, read_one, invert)
+    threshold = gaussian_threshold(**fit)
+    return threshold, gaussian_bit_error_rate(threshold, **fit, invert=invert), fit
+
+
+def check_tail_fit(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    threshold: np.ndarray,
+    fit: dict,
+    invert: Union[bool, np.ndarray] = False,
+) -> dict:
+    """Compare the errors counted at the threshold with the extrapolation.
+
+    The counted errors are Poisson distributed about the number the tail
+    Gaussians predict. Counts in either tail of that distribution beyond
+    ``CONSISTENCY_LEVEL`` mean the errors do not come from the Gaussian
+    tails, e.g. genuine bit flips far from the cores or distributions with
+    several modes. Tail Gaussians in the wrong order for the polarity
+    never describe the errors.
+
+    Returns
+    -------
+    check : dict
+        ``bit_errors`` and ``expected_errors`` per point and whether the
+        point is ``consistent`` with the extrapolation.
+    """
+    from scipy.special import pdtr, pdtrc
+
+    w0r1, w1r0 = gaussian_error_probabilities(threshold, **fit, invert=invert)
+    errors0, errors1 = count_errors(read_zero, read_one, threshold, invert)
+    bit_errors = errors0 + errors1
+    expected = w0r1 * read_zero.shape[-1] + w1r0 * read_one.shape[-1]
+
+    direction = np.where(invert, -1.0, 1.0)
+    ordered = direction * (fit["mean1"] - fit["mean0"]) > 0
+    too_many = (bit_errors > 0) & (pdtrc(bit_errors - 1, expected) < CONSISTENCY_LEVEL)
+    too_few = pdtr(bit_errors, expected) < CONSISTENCY_LEVEL
+    return {
+        "bit_errors": bit_errors,
+        "expected_errors": expected,
+        "consistent": ordered & ~(too_many | too_few),
+    }
+
+
+def estimate_tail_ber(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+    num_bootstrap: int = NUM_BOOTSTRAP,
+    confidence: float = CONFIDENCE_LEVEL,
+    seed: Optional[int] = None,
+) -> dict:
+    """Extrapolated bit error rate at the optimal threshold for many points.
+
+    The estimate assumes the facing tails stay Gaussian beyond the shots
+    measured. Where the errors counted at the threshold contradict that,
+    the point is flagged and the counted rate at the empirical optimum of
+    ``search_optimal_threshold`` is returned instead, with its
+    Clopper-Pearson interval. Extrapolated rates and bounds are clipped to
+    ``get_extrapolation_floor``; a point whose extrapolation falls below
+    it is not ``resolved`` and reports the floor as an upper estimate.
+    No rate or bound exceeds 0.5.
+
+    Parameters
+    ----------
+    read_zero, read_one : np.ndarray
+        Shot voltages, shape (num_points, num_shots). The shots must be
+        finite.
+    invert : bool or np.ndarray
+        Polarity of all points or of each point, see ``count_errors``,
+        e.g. from ``get_readout_polarity``.
+    num_bootstrap : int
+        Resamples of the shots used for the confidence interval; 0 skips it.
+    confidence : float
+        Two-sided confidence level of the interval.
+
+    Returns
+    -------
+    estimate : dict
+        ``threshold``, ``bit_error_rate``, ``lower`` and ``upper`` per point,
+        whether the rate is ``resolved``, the clipped extrapolation
+        ``tail_bit_error_rate``, the fitted means and widths and the counts
+        of ``check_tail_fit``.
+    """
+    read_zero = np.asarray(read_zero, dtype=float)
+    read_one = np.asarray(read_one, dtype=float)
+    invert = np.broadcast_to(np.asarray(invert, dtype=bool), read_zero.shape[:-1])
+    num_shots = read_zero.shape[-1] + read_one.shape[-1]
+    floor = get_extrapolation_floor(num_shots)
+
+    threshold, bit_error_rate, fit = _tail_fit_ber(read_zero, read_one, invert)
+    estimate = {**fit, **check_tail_fit(read_zero, read_one, threshold, fit, invert)}
+
+    if num_bootstrap == 0:
+        lower = upper = bit_error_rate
+    else:
+        rng = np.random.default_rng(seed)
+        samples = []
+        for start in range(0, num_bootstrap, BOOTSTRAP_BATCH):
+            batch = min(BOOTSTRAP_BATCH, num_bootstrap - start)
+            # Resampled shots are shaped (batch, num_points, num_shots)
+            index0 = rng.integers(
+                0, read_zero.shape[-1], (batch, 1, read_zero.shape[-1])
+            )
+            index1 = rng.integers(0, read_one.shape[-1], (batch, 1, read_one.shape[-1]))
+            _, resampled, _ = _tail_fit_ber(
+                np.take_along_axis(read_zero[None], index0, axis=-1),
+                np.take_along_axis(read_one[None], index1, axis=-1),
+                invert,
+            )
+            samples.append(resampled)
+        samples = np.concatenate(samples)
+        alpha = 1 - confidence
+        lower, upper = np.quantile(samples, [alpha / 2, 1 - alpha / 2], axis=0)
+
+    # Fall back to the counted rate at the empirical optimum where the
+    # extrapolation is rejected
+    counted = search_optimal_threshold(read_zero, read_one, invert)
+    bit_errors = counted["write_0_read_1"] + counted["write_1_read_0"]
+    counted_lower, counted_upper = clopper_pearson_interval(
+        bit_errors, num_shots, confidence
+    )
+    consistent = estimate["consistent"]
+    tail_bit_error_rate = np.clip(bit_error_rate, floor, 0.5)
+    estimate.update(
+        {
+            "threshold": np.where(consistent, threshold, counted["threshold"]),
+            "tail_bit_error_rate": tail_bit_error_rate,
+            "bit_error_rate": np.minimum(
+                np.where(consistent, tail_bit_error_rate, counted["bit_error_rate"]),
+                0.5,
+            ),
+            "lower": np.minimum(
+                np.where(consistent, np.clip(lower, floor, 0.5), counted_lower), 0.5
+            ),
+            "upper": np.minimum(
+                np.where(consistent, np.clip(upper, floor, 0.5), counted_upper), 0.5
+            ),
+            "resolved": ~consistent | (bit_error_rate >= floor),
+        }
+    )
+    return estimate
+
+
+def estimate_bit_error_rate(
+    data_dict: dict, invert: Optional[Union[bool, np.ndarray]] = None, **kwargs
+) -> dict:
+    """Tail-fit estimate for every sweep point of a measurement file.
+
+    The polarity defaults to ``get_readout_polarity`` of the file.
+    """
+    read_zero, read_one = get_read_voltages(data_dict)
+    if invert is None:
+        invert = get_readout_polarity(data_dict)
+    return estimate_tail_ber(read_zero, read_one, invert, **kwargs)
+
+
+def estimate_directory(
+    file_path: str, invert: Optional[bool] = None, **kwargs
+) -> list[dict]:
+    """Tail-fit estimates for every file of a directory in one vectorised call.
+
+    The polarity of each point is ``get_readout_polarity`` unless ``invert``
+    is given.
+    """
+    files, voltages = load_read_voltages(file_path)
+    if invert is None:
+        point_invert = load_polarities(file_path, files, readout=True)
+    else:
+        point_invert = [np.full(len(read_zero), invert) for read_zero, _ in voltages]
+    return apply_stacked(
+        files,
+        voltages,
+        estimate_tail_ber,
+        per_file={"invert": point_invert},
+        **kwargs,
+    )
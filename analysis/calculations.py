@@ -2,6 +2,8 @@ from typing import Tuple
 
 import numpy as np
 
+from .constants import HEATING_EXPONENT
+
 
 def safe_max(arr: np.ndarray, mask: np.ndarray) -> float:
     if np.any(mask):
@@ -75,14 +77,13 @@ def calculate_channel_temperature(
     substrate_temperature: float,
     ih: float,
     ih_max: float,
+    exponent: float = HEATING_EXPONENT,
 ) -> float:
-    N = 2.0
-    beta = 1.25
-    if ih_max == 0:
+    if np.any(np.asarray(ih_max) == 0):
         raise ValueError("ih_max cannot be zero to avoid division by zero.")
 
     channel_temperature = (critical_temperature**4 - substrate_temperature**4) * (
-        (ih / ih_max) ** N
+        (ih / ih_max) ** exponent
     ) + substrate_temperature**4
 
     channel_temperature = np.maximum(channel_temperature, 0)
@@ -112,3 +113,55 @@ def get_bit_error_rate_args(bit_error_rate: np.ndarray) -> list:
     return nominal_arg1, nominal_arg2, inverting_arg1, inverting_arg2
 
 
+
+
+def interpolate_rows(
+    grid: np.ndarray, xp_list: list[np.ndarray], fp_list: list[np.ndarray]
+) -> np.ndarray:
+    """Linearly interpolate many curves onto a common grid in one call.
+
+    Each curve is shifted onto its own non-overlapping interval so that a
+    single ``np.interp`` over the concatenated curves resamples all of them.
+    Grid points outside a curve's own range are returned as NaN.
+
+    Parameters
+    ----------
+    grid : np.ndarray
+        The common grid, shape (n_grid,).
+    xp_list : list[np.ndarray]
+        The x coordinates of each curve. Curves may have different lengths.
+    fp_list : list[np.ndarray]
+        The y values of each curve.
+
+    Returns
+    -------
+    values : np.ndarray
+        The resampled curves, shape (n_curves, n_grid).
+    """
+    grid = np.asarray(grid, dtype=float)
+    num_rows = len(xp_list)
+    xp_rows = [np.asarray(xp, dtype=float).ravel() for xp in xp_list]
+    fp_rows = [np.asarray(fp, dtype=float).ravel() for fp in fp_list]
+
+    lengths = np.array([len(xp) for xp in xp_rows])
+    row_index = np.repeat(np.arange(num_rows), lengths)
+    xp = np.concatenate(xp_rows)
+    fp = np.concatenate(fp_rows)
+
+    order = np.lexsort((xp, row_index))
+    xp = xp[order]
+    fp = fp[order]
+
+    xmin = np.minimum.reduceat(xp, np.r_[0, np.cumsum(lengths)[:-1]])
+    xmax = np.maximum.reduceat(xp, np.r_[0, np.cumsum(lengths)[:-1]])
+    span = max(np.nanmax(xp), grid.max()) - min(np.nanmin(xp), grid.min()) + 1.0
+    offsets = np.arange(num_rows) * 2 * span
+
+    values = np.interp(
+        (grid[None, :] + offsets[:, None]).ravel(),
+        xp + offsets[row_index],
+        fp,
+    ).reshape(num_rows, len(grid))
+    outside = (grid[None, :] < xmin[:, None]) | (grid[None, :] > xmax[:, None])
+    values[outside] = np.nan
+    return values
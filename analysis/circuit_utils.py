@@ -1,9 +1,13 @@
 
-import ltspice
+from typing import TYPE_CHECKING
+
 import numpy as np
 
 from .constants import VOLTAGE_THRESHOLD
 
+if TYPE_CHECKING:
+    import ltspice
+
 
 def get_ltsp_ber(
     read_zero_voltage: float,
@@ -44,7 +48,7 @@ def get_ltsp_prob(
     return switching_probability
 
 def get_current_or_voltage(
-    ltsp: ltspice.Ltspice, signal: str, case: int = 0
+    ltsp: "ltspice.Ltspice", signal: str, case: int = 0
 ) -> np.ndarray:
     signal_data = ltsp.get_data(f"I({signal})", case=case)
     if signal_data is None:
@@ -0,0 +1,100 @@
+from typing import Literal, Tuple
+
+import numpy as np
+
+CONFIDENCE_LEVEL = 0.95
+
+
+def get_num_shots(data_dict: dict) -> int:
+    """Number of bits behind each bit error rate point.
+
+    Every point writes and reads ``num_meas`` zeros and ``num_meas`` ones.
+    """
+    return 2 * int(np.asarray(data_dict.get("num_meas")).flatten()[0])
+
+
+def get_bit_errors(data_dict: dict) -> np.ndarray:
+    w0r1 = data_dict.get("write_0_read_1").flatten()
+    w1r0 = data_dict.get("write_1_read_0").flatten()
+    return (w0r1 + w1r0).astype(float)
+
+
+def wilson_interval(
+    bit_error_rate: np.ndarray,
+    num_shots: np.ndarray,
+    confidence: float = CONFIDENCE_LEVEL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval for an array of bit error rates.
+
+    Parameters
+    ----------
+    bit_error_rate : np.ndarray
+        The measured bit error rates, any shape.
+    num_shots : np.ndarray
+        The number of bits behind each rate, broadcastable to the rates.
+    confidence : float
+        The two-sided confidence level.
+
+    Returns
+    -------
+    lower, upper : np.ndarray
+        The interval bounds with the shape of ``bit_error_rate``.
+    """
+    from scipy.special import ndtri
+
+    p = np.asarray(bit_error_rate, dtype=float)
+    n = np.asarray(num_shots, dtype=float)
+    z = ndtri(0.5 + confidence / 2)
+
+    denominator = 1 + z**2 / n
+    center = (p + z**2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denominator
+    lower = np.clip(center - half_width, 0, 1)
+    upper = np.clip(center + half_width, 0, 1)
+    return lower, upper
+
+
+def clopper_pearson_interval(
+    bit_errors: np.ndarray,
+    num_shots: np.ndarray,
+    confidence: float = CONFIDENCE_LEVEL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact Clopper-Pearson interval from error counts."""
+    from scipy.special import betaincinv
+
+    k = np.asarray(bit_errors, dtype=float)
+    n = np.asarray(num_shots, dtype=float)
+    alpha = 1 - confidence
+
+    with np.errstate(invalid="ignore"):
+        lower = np.where(k > 0, betaincinv(k, n - k + 1, alpha / 2), 0.0)
+        upper = np.where(k < n, betaincinv(k + 1, n - k, 1 - alpha / 2), 1.0)
+    return lower, upper
+
+
+def get_bit_error_rate_interval(
+    data_dict: dict,
+    method: Literal["wilson", "clopper_pearson"] = "wilson",
+    confidence: float = CONFIDENCE_LEVEL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    num_shots = get_num_shots(data_dict)
+    if method == "wilson":
+        bit_error_rate = data_dict.get("bit_error_rate").flatten()
+        return wilson_interval(bit_error_rate, num_shots, confidence)
+    if method == "clopper_pearson":
+        bit_errors = get_bit_errors(data_dict)
+        return clopper_pearson_interval(bit_errors, num_shots, confidence)
+    raise ValueError(f"Invalid method: {method}")
+
+
+def get_errorbar(
+    bit_error_rate: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """Asymmetric ``yerr`` array for ``Axes.errorbar``."""
+    bit_error_rate = np.asarray(bit_error_rate, dtype=float)
+    return np.stack(
+        [
+            np.maximum(bit_error_rate - lower, 0),
+            np.maximum(upper - bit_error_rate, 0),
+        ]
+    )
@@ -1,6 +1,7 @@
 
 SUBSTRATE_TEMP = 1.3
 CRITICAL_TEMP = 12.3
+HEATING_EXPONENT = 2.0
 READ_XMIN = 400
 READ_XMAX = 1000
 IC0_C3 = 910
@@ -1,11 +1,16 @@
 import collections
+import csv
 import os
-from typing import Literal, Tuple
+from typing import TYPE_CHECKING, Literal, Tuple
 
-import ltspice
 import numpy as np
 
-from .calculations import calculate_channel_temperature, safe_max, safe_min
+from .calculations import (
+    calculate_channel_temperature,
+    filter_plateau,
+    safe_max,
+    safe_min,
+)
 from .circuit_utils import (
     get_current_or_voltage,
     get_ltsp_ber,
@@ -16,9 +21,13 @@ from .constants import (
     CRITICAL_TEMP,
     SUBSTRATE_TEMP,
 )
+from .sweep_dataset import get_sweep_dataset
+
+if TYPE_CHECKING:
+    import ltspice
 
 
-def process_read_data(ltsp: ltspice.Ltspice) -> dict:
+def process_read_data(ltsp: "ltspice.Ltspice") -> dict:
     num_cases = ltsp.case_count
 
     read_current = np.zeros(num_cases)
@@ -108,15 +117,10 @@ def process_read_data(ltsp: ltspice.Ltspice) -> dict:
 
 
 def get_enable_current_sweep(data_dict: dict) -> np.ndarray:
-
-    enable_current_array: np.ndarray = data_dict.get("x")[:, :, 0].flatten() * 1e6
-    if len(enable_current_array) == 1:
-        enable_current_array = data_dict.get("x")[:, 0].flatten() * 1e6
-
-    if enable_current_array[0] == enable_current_array[1]:
-        enable_current_array = data_dict.get("y")[:, :, 0].flatten() * 1e6
-
-    return enable_current_array
+    dataset = get_sweep_dataset(data_dict)
+    if not dataset.dims:
+        return dataset.coords[dataset.axis_names["x"]]
+    return dataset.coords[dataset.dims[-1]]
 
 
 def get_bit_error_rate_args(bit_error_rate: np.ndarray) -> list:
@@ -141,6 +145,18 @@ def get_bit_error_rate_args(bit_error_rate: np.ndarray) -> list:
 
 
 
+def get_sweep_array(
+    data_dict: dict, parameter_z: Literal["bit_error_rate", "total_switches_norm"]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if data_dict.get("total_switches_norm") is None:
+        data_dict["total_switches_norm"] = get_total_switches_norm(data_dict)
+    dataset = get_sweep_dataset(data_dict)
+    x = dataset.coords[dataset.axis_names["x"]]
+    y = dataset.coords[dataset.axis_names["y"]]
+    zarray = dataset.grid(parameter_z).reshape(dataset.grid_shape)
+    return x, y, zarray
+
+
 def get_total_switches_norm(data_dict: dict) -> np.ndarray:
     num_meas = data_dict.get("num_meas")[0][0]
     w0r1 = data_dict.get("write_0_read_1").flatten()
@@ -214,6 +230,61 @@ def get_fitting_points(
     return xfit, yfit
 
 
+def get_enable_fit(data_dict: dict) -> dict:
+    """Critical current vs enable current fit of an enable response map.
+
+    The fit is computed once and cached in ``data_dict["enable_fit"]`` so
+    every view of the same cell, and any export, reuses it.
+
+    Returns
+    -------
+    fit : dict
+        ``xfit``/``yfit`` are the half-maximum points of the map,
+        ``xfit_linear``/``yfit_linear`` the points below the plateau used for
+        the linear fit, ``coefficients`` the ``np.polyfit`` result,
+        ``x_intercept`` its zero crossing and ``y_step`` the map's row step.
+    """
+    fit = data_dict.get("enable_fit")
+    if fit is not None:
+        return fit
+
+    x = data_dict["x"][0]
+    y = data_dict["y"][0]
+    xfit, yfit = get_fitting_points(x, y, data_dict["ztotal"])
+    xfit_linear, yfit_linear = filter_plateau(xfit, yfit, yfit[0] * 0.75)
+    coefficients = np.polyfit(xfit_linear, yfit_linear, 1)
+    fit = {
+        "xfit": xfit,
+        "yfit": yfit,
+        "xfit_linear": xfit_linear,
+        "yfit_linear": yfit_linear,
+        "coefficients": coefficients,
+        "x_intercept": -coefficients[1] / coefficients[0],
+        "y_step": y[1] - y[0],
+    }
+    data_dict["enable_fit"] = fit
+    return fit
+
+
+def save_enable_fits(dict_list: list[dict], file_path: str) -> None:
+    """Write the linear enable fit of each cell to a CSV file."""
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["cell", "slope", "y_intercept", "x_intercept", "num_points"])
+        for data_dict in dict_list:
+            fit = get_enable_fit(data_dict)
+            slope, y_intercept = fit["coefficients"]
+            writer.writerow(
+                [
+                    get_current_cell(data_dict),
+                    slope,
+                    y_intercept,
+                    fit["x_intercept"],
+                    len(fit["xfit_linear"]),
+                ]
+            )
+
+
 def get_step_parameter(data_dict: dict) -> str:
     keys = [
         "write_current",
@@ -266,8 +337,8 @@ def get_write_currents(data_dict: dict) -> np.ndarray:
 
 
 def get_read_currents(data_dict: dict) -> np.ndarray:
-    read_currents = data_dict.get("y")[:, :, 0] * 1e6
-    return read_currents.flatten()
+    dataset = get_sweep_dataset(data_dict)
+    return dataset.coords[dataset.axis_names["y"]]
 
 
 def get_write_current(data_dict: dict) -> float:
@@ -277,6 +348,27 @@ def get_write_current(data_dict: dict) -> float:
         return data_dict.get("write_current")[0, 0] * 1e6
 
 
+def get_shot_array(
+    data_dict: dict, key: Literal["read_zero_top", "read_one_top"]
+) -> np.ndarray:
+    """Shot voltages of a file as (num_points, num_shots).
+
+    Sweeps store shots as (1, num_shots, num_points), single points as
+    (1, num_shots).
+    """
+    shots = np.asarray(data_dict[key], dtype=float)
+    if shots.ndim == 3:
+        return shots[0].T
+    return shots.reshape(1, -1)
+
+
+def get_read_voltages(data_dict: dict) -> Tuple[np.ndarray, np.ndarray]:
+    return (
+        get_shot_array(data_dict, "read_zero_top"),
+        get_shot_array(data_dict, "read_one_top"),
+    )
+
+
 def get_voltage_trace_data(
     data_dict: dict,
     trace_name: Literal["trace_chan_in", "trace_chan_out", "trace_enab"],
@@ -0,0 +1,106 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Each pyramid level merges this many buckets of the level below
+PYRAMID_FACTOR = 4
+# Levels are built until they drop below this many points
+PYRAMID_MIN_POINTS = 512
+# Points drawn per horizontal pixel, one minimum and one maximum
+POINTS_PER_PIXEL = 2
+
+
+def minmax_buckets(
+    x: np.ndarray, y: np.ndarray, size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce consecutive groups of ``size`` samples to their min and max.
+
+    The two extremes of each group are kept in time order, so peaks and
+    glitches survive any amount of decimation. NaN samples are skipped,
+    and a group of only NaN stays NaN, a gap in the drawn line.
+    """
+    num_buckets = -(-len(y) // size)
+    padded = np.full(num_buckets * size, np.nan)
+    padded[: len(y)] = y
+    buckets = padded.reshape(num_buckets, size)
+
+    # NaN never wins either extreme, a bucket of only NaN keeps its first sample
+    finite = np.isfinite(buckets)
+    imin = np.argmin(np.where(finite, buckets, np.inf), axis=1)
+    imax = np.argmax(np.where(finite, buckets, -np.inf), axis=1)
+    offsets = np.arange(num_buckets)[:, None] * size
+    index = offsets + np.stack(
+        [np.minimum(imin, imax), np.maximum(imin, imax)], axis=1
+    )
+    index = index.ravel()
+    return x[index], y[index]
+
+
+def build_pyramid(
+    x: np.ndarray,
+    y: np.ndarray,
+    factor: int = PYRAMID_FACTOR,
+    min_points: int = PYRAMID_MIN_POINTS,
+) -> list[Tuple[np.ndarray, np.ndarray]]:
+    """Min/max envelopes of a trace at successively coarser resolutions.
+
+    Level 0 is the trace itself. Each level has about ``factor`` times
+    fewer points than the one below and is built from it, so the whole
+    pyramid costs O(n).
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    levels = [(x, y)]
+    size = factor
+    while len(levels[-1][1]) > min_points * factor:
+        levels.append(minmax_buckets(*levels[-1], size))
+        # Later levels hold a (min, max) pair per bucket
+        size = 2 * factor
+    return levels
+
+
+def get_trace_pyramid(
+    data_dict: dict, name: str, x: np.ndarray, y: np.ndarray
+) -> list[Tuple[np.ndarray, np.ndarray]]:
+    """Pyramid of a trace, cached in ``data_dict["trace_pyramids"]``."""
+    pyramids = data_dict.setdefault("trace_pyramids", {})
+    if name not in pyramids:
+        pyramids[name] = build_pyramid(x, y)
+    return pyramids[name]
+
+
+def select_window(
+    x: np.ndarray, xlim: Optional[Tuple[float, float]]
+) -> slice:
+    """Samples inside ``xlim`` plus one on each side, so lines reach the edges."""
+    if xlim is None:
+        return slice(None)
+    start = max(np.searchsorted(x, min(xlim), side="left") - 1, 0)
+    stop = np.searchsorted(x, max(xlim), side="right") + 1
+    return slice(start, stop)
+
+
+def decimate_pyramid(
+    pyramid: list[Tuple[np.ndarray, np.ndarray]],
+    xlim: Optional[Tuple[float, float]],
+    pixel_width: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The visible part of the coarsest level that still resolves every pixel.
+
+    Parameters
+    ----------
+    pyramid : list
+        Levels from ``build_pyramid``.
+    xlim : tuple, optional
+        The visible x range. None draws the whole trace.
+    pixel_width : float
+        Width of the axes in output pixels.
+    """
+    required = POINTS_PER_PIXEL * pixel_width
+    for x, y in reversed(pyramid[1:]):
+        window = select_window(x, xlim)
+        if len(x[window]) >= required:
+            return x[window], y[window]
+    x, y = pyramid[0]
+    window = select_window(x, xlim)
+    return x[window], y[window]
@@ -1,6 +1,38 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Union
 
-import scipy.io as sio
+# Variables read by the analysis getters for a parameter sweep file.
+SWEEP_KEYS = [
+    "x",
+    "y",
+    "sweep_x_len",
+    "sweep_y_len",
+    "cell",
+    "sample_name",
+    "num_meas",
+    "write_current",
+    "read_current",
+    "enable_write_current",
+    "enable_read_current",
+    "write_width",
+    "read_width",
+    "bit_error_rate",
+    "write_0_read_1",
+    "write_1_read_0",
+]
+
+# Repository root, relative data paths are taken from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded files kept in memory by a long-running process, keyed by path and
+# keys. None unless enabled with enable_data_cache().
+DATA_CACHE = None
+
+
+def resolve_data_path(path: str) -> str:
+    """A data path relative to the repository root, absolute paths unchanged."""
+    return os.path.join(ROOT, path)
 
 
 def get_file_names(file_path: str) -> list:
@@ -15,14 +47,130 @@ def save_directory_list(file_path: str, file_list: list[str]) -> None:
             f.write(file_name + "\n")
     f.close()
 
-def import_directory(file_path: str) -> list[dict]:
+
+def select_files(
+    file_list: list[str], select: Optional[Union[slice, list[int]]] = None
+) -> list[str]:
+    if select is None:
+        return file_list
+    if isinstance(select, slice):
+        return file_list[select]
+    return [file_list[i] for i in select]
+
+
+def enable_data_cache() -> dict:
+    global DATA_CACHE
+    if DATA_CACHE is None:
+        DATA_CACHE = {}
+    return DATA_CACHE
+
+
+def clear_data_cache() -> None:
+    if DATA_CACHE is not None:
+        DATA_CACHE.clear()
+
+
+def load_file(file: str, keys: Optional[list[str]] = None) -> dict:
+    """Load a .mat file, reusing the cached copy while the file is unchanged."""
+    import scipy.io as sio
+
+    if DATA_CACHE is None:
+        return sio.loadmat(file, variable_names=keys)
+
+    key = (os.path.abspath(file), tuple(keys) if keys is not None else None)
+    mtime = os.path.getmtime(file)
+    cached = DATA_CACHE.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, sio.loadmat(file, variable_names=keys))
+        DATA_CACHE[key] = cached
+    return cached[1]
+
+
+def load_cached(file: str, loader: Callable[[str], dict]) -> dict:
+    """``loader(file)``, kept in the data cache while the file is unchanged.
+
+    Lets parsers of other formats, e.g. LTspice .raw files, share the cache
+    of ``load_file`` and its clearing.
+    """
+    if DATA_CACHE is None:
+        return loader(file)
+
+    key = (os.path.abspath(file), f"{loader.__module__}.{loader.__qualname__}")
+    mtime = os.path.getmtime(file)
+    cached = DATA_CACHE.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, loader(file))
+        DATA_CACHE[key] = cached
+    return cached[1]
+
+
+def import_directory(
+    file_path: str,
+    keys: Optional[list[str]] = None,
+    select: Optional[Union[slice, list[int]]] = None,
+) -> list[dict]:
     dict_list = []
     files = get_file_names(file_path)
     files = sorted(files)
-    for file in files:
-        data = sio.loadmat(os.path.join(file_path, file))
+    for file in select_files(files, select):
+        data = load_file(os.path.join(file_path, file), keys)
         dict_list.append(data)
 
     save_directory_list(file_path, files)
     return dict_list
 
+
+def plan_data_inputs(data_inputs: dict, save_list: bool = True) -> dict:
+    """Resolve declared figure inputs to the files and keys to load.
+
+    Each input is a dict with a directory ``path`` relative to the
+    repository root, the ``keys`` to read (None reads every variable) and an
+    optional ``select`` slice or list of indices into the sorted file list.
+
+    Returns
+    -------
+    plan : dict
+        For each input, the selected file paths and the keys to read.
+    """
+    plan = {}
+    for name, spec in data_inputs.items():
+        directory = resolve_data_path(spec["path"])
+        files = sorted(get_file_names(directory))
+        if save_list:
+            save_directory_list(directory, files)
+        plan[name] = {
+            "files": [
+                os.path.join(directory, file)
+                for file in select_files(files, spec.get("select"))
+            ],
+            "keys": spec.get("keys"),
+        }
+    return plan
+
+
+def load_data_inputs(
+    data_inputs: dict, parallel: bool = True, max_workers: Optional[int] = None
+) -> dict:
+    """Load exactly the files and variables declared by a figure.
+
+    Returns
+    -------
+    data : dict
+        For each input name, the list of loaded dicts in file order.
+    """
+    plan = plan_data_inputs(data_inputs)
+    tasks = [
+        (name, file, entry["keys"])
+        for name, entry in plan.items()
+        for file in entry["files"]
+    ]
+    if parallel and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            loaded = list(executor.map(lambda task: load_file(*task[1:]), tasks))
+    else:
+        loaded = [load_file(file, keys) for _, file, keys in tasks]
+
+    data = {name: [] for name in data_inputs}
+    for (name, _, _), data_dict in zip(tasks, loaded):
+        data[name].append(data_dict)
+    return data
@@ -0,0 +1,209 @@
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .data_processing import get_shot_array
+from .file_utils import get_file_names, load_file
+
+# Shots binned per np.histogram call, bounds the temporary memory
+CHUNK_SIZE = 2**22
+READ_VOLTAGE_KEYS = ["read_zero_top", "read_one_top"]
+
+
+@dataclass
+class ShotHistogram:
+    """Histogram of shot voltages accumulated in bounded memory.
+
+    Shots are added in chunks from any number of arrays or files; only the
+    bin counts are kept. With ``adaptive`` the bins are uniform and double
+    in width whenever a shot falls outside the current range, so the number
+    of bins stays fixed. Otherwise shots outside ``edges`` are counted as
+    underflow or overflow.
+
+    Attributes
+    ----------
+    edges : np.ndarray
+        Bin edges, shape (num_bins + 1,).
+    counts : np.ndarray
+        Shots per bin.
+    adaptive : bool
+        Whether the range grows to cover every shot.
+    underflow, overflow : int
+        Shots below or above a fixed range.
+    minimum, maximum : float
+        Extremes of all shots added.
+    """
+
+    edges: np.ndarray
+    counts: np.ndarray = field(default=None)
+    adaptive: bool = False
+    underflow: int = 0
+    overflow: int = 0
+    minimum: float = np.inf
+    maximum: float = -np.inf
+
+    def __post_init__(self):
+        self.edges = np.asarray(self.edges, dtype=float)
+        if self.counts is None:
+            self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    @classmethod
+    def fixed(cls, range: Tuple[float, float], bins: int = 100) -> "ShotHistogram":
+        return cls(np.linspace(range[0], range[1], bins + 1))
+
+    @classmethod
+    def adaptive_bins(
+        cls, bins: int = 256, range: Optional[Tuple[float, float]] = None
+    ) -> "ShotHistogram":
+        """Adaptive histogram, its initial range set by the first chunk if not given."""
+        if bins % 2:
+            raise ValueError("Adaptive histograms need an even number of bins")
+        edges = np.linspace(*range, bins + 1) if range is not None else np.zeros(bins + 1)
+        return cls(edges, adaptive=True)
+
+    @property
+    def num_bins(self) -> int:
+        return len(self.counts)
+
+    @property
+    def num_shots(self) -> int:
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    @property
+    def centers(self) -> np.ndarray:
+        return 0.5 * (self.edges[:-1] + self.edges[1:])
+
+    def _initialize_range(self, vmin: float, vmax: float) -> None:
+        span = vmax - vmin if vmax > vmin else max(abs(vmin), 1.0) * 1e-6
+        self.edges = np.linspace(vmin, vmin + span * (1 + 1e-9), self.num_bins + 1)
+
+    def _expand(self, vmin: float, vmax: float) -> None:
+        """Double the bin width until [vmin, vmax] is inside the range."""
+        while vmin < self.edges[0] or vmax >= self.edges[-1]:
+            width = self.edges[1] - self.edges[0]
+            half = self.num_bins // 2
+            merged = self.counts.reshape(half, 2).sum(axis=1)
+            zeros = np.zeros(half, dtype=np.int64)
+            if vmin < self.edges[0]:
+                start = self.edges[0] - self.num_bins * width
+                self.counts = np.concatenate([zeros, merged])
+            else:
+                start = self.edges[0]
+                self.counts = np.concatenate([merged, zeros])
+            self.edges = start + 2 * width * np.arange(self.num_bins + 1)
+
+    def _cover(self, vmin: float, vmax: float) -> None:
+        if self.edges[0] == self.edges[-1]:
+            self._initialize_range(vmin, vmax)
+        self._expand(vmin, vmax)
+
+    def add(self, values: np.ndarray, chunk_size: int = CHUNK_SIZE) -> "ShotHistogram":
+        values = np.asarray(values, dtype=float).ravel()
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start : start + chunk_size]
+            chunk = chunk[np.isfinite(chunk)]
+            if len(chunk) == 0:
+                continue
+            vmin, vmax = chunk.min(), chunk.max()
+            if self.adaptive:
+                self._cover(vmin, vmax)
+            else:
+                self.underflow += int(np.count_nonzero(chunk < self.edges[0]))
+                self.overflow += int(np.count_nonzero(chunk > self.edges[-1]))
+            self.counts += np.histogram(chunk, self.edges)[0]
+            self.minimum = min(self.minimum, vmin)
+            self.maximum = max(self.maximum, vmax)
+        return self
+
+    def merge(self, other: "ShotHistogram") -> "ShotHistogram":
+        """Add the counts of another histogram, e.g. from a parallel worker.
+
+        Adaptive histograms are rebinned by the centres of ``other``'s bins.
+        """
+        if self.adaptive:
+            if np.isfinite(other.minimum):
+                self._cover(other.minimum, other.maximum)
+                target = np.searchsorted(self.edges, other.centers, side="right") - 1
+                target = np.clip(target, 0, self.num_bins - 1)
+                np.add.at(self.counts, target, other.counts)
+        elif np.array_equal(self.edges, other.edges):
+            self.counts += other.counts
+        else:
+            raise ValueError("Fixed histograms must share their bin edges to merge")
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def quantile(self, q) -> np.ndarray:
+        """Quantiles of the binned shots, linear within a bin.
+
+        Underflow and overflow shots count towards the ranks and fall on the
+        range edges.
+        """
+        q = np.asarray(q, dtype=float)
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)]) + self.underflow
+        rank = q * self.num_shots
+        index = np.clip(
+            np.searchsorted(cumulative, rank, side="left") - 1, 0, self.num_bins - 1
+        )
+        in_bin = np.where(self.counts[index] > 0, self.counts[index], 1)
+        fraction = np.clip((rank - cumulative[index]) / in_bin, 0, 1)
+        return self.edges[index] + fraction * (self.edges[index + 1] - self.edges[index])
+
+    def density(self) -> np.ndarray:
+        return self.counts / (self.num_shots * np.diff(self.edges))
+
+
+def histogram_shots(
+    files: list[str],
+    keys: list[str] = READ_VOLTAGE_KEYS,
+    bins: int = 100,
+    range: Optional[Tuple[float, float]] = None,
+    point: Optional[int] = None,
+) -> dict:
+    """Accumulate the shot voltages of many files, one file in memory at a time.
+
+    Parameters
+    ----------
+    files : list[str]
+        The .mat files to read.
+    keys : list[str]
+        Shot arrays to histogram, shaped (1, num_shots, num_points) in
+        sweeps and (1, num_shots) for a single point, as read by
+        ``get_shot_array``.
+    bins : int
+        Number of bins.
+    range : tuple, optional
+        Fixed bin range. Adaptive bins are used when not given.
+    point : int, optional
+        Only the shots of this sweep point, 0 for single-point files. All
+        points by default.
+
+    Returns
+    -------
+    histograms : dict
+        A ShotHistogram for each key.
+    """
+    histograms = {
+        key: ShotHistogram.fixed(range, bins)
+        if range is not None
+        else ShotHistogram.adaptive_bins(bins + bins % 2)
+        for key in keys
+    }
+    for file in files:
+        data_dict = load_file(file, keys)
+        for key in keys:
+            shots = get_shot_array(data_dict, key)
+            if point is not None:
+                shots = shots[point]
+            histograms[key].add(shots)
+    return histograms
+
+
+def histogram_directory(file_path: str, **kwargs) -> dict:
+    files = sorted(get_file_names(file_path))
+    return histogram_shots([os.path.join(file_path, file) for file in files], **kwargs)
@@ -0,0 +1,215 @@
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
+from .calculations import interpolate_rows
+from .data_processing import (
+    get_bit_error_rate,
+    get_enable_current_sweep,
+    get_sweep_array,
+)
+
+BER_TARGET = 1e-3
+
+
+def stack_sweep_arrays(
+    dict_list: list[dict],
+    parameter_z: Literal["bit_error_rate", "total_switches_norm"] = "bit_error_rate",
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stack the 2-D maps of several sweeps with identical grid shapes.
+
+    Returns
+    -------
+    x : np.ndarray
+        Column coordinates of each map, shape (n_maps, nx).
+    y : np.ndarray
+        Row coordinates of each map, shape (n_maps, ny).
+    z : np.ndarray
+        The stacked maps, shape (n_maps, ny, nx).
+    """
+    arrays = [get_sweep_array(data_dict, parameter_z) for data_dict in dict_list]
+    shapes = {zarray.shape for _, _, zarray in arrays}
+    if len(shapes) != 1:
+        raise ValueError(f"Cannot stack sweeps with different shapes: {shapes}")
+
+    x = np.stack([xarr for xarr, _, _ in arrays])
+    y = np.stack([yarr for _, yarr, _ in arrays])
+    z = np.stack([zarray for _, _, zarray in arrays]).astype(float)
+    return x, y, z
+
+
+def build_family_array(
+    dict_list: list[dict],
+    variable_name: Literal[
+        "write_current",
+        "enable_write_current",
+        "enable_read_current",
+    ],
+    grid: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Combine a family of 1-D sweeps into one 2-D map.
+
+    Each sweep becomes a row of the map, ordered by its step value
+    ``variable_name``. The sweeps are resampled onto a common column grid.
+
+    Returns
+    -------
+    x : np.ndarray
+        The common sweep grid in microamps, shape (nx,).
+    y : np.ndarray
+        The sorted step values in microamps, shape (ny,).
+    z : np.ndarray
+        The bit error rate map, shape (ny, nx).
+    """
+    step_values = np.array(
+        [data_dict[variable_name].flatten()[0] * 1e6 for data_dict in dict_list]
+    )
+    sweeps = [get_enable_current_sweep(data_dict) for data_dict in dict_list]
+    values = [get_bit_error_rate(data_dict) for data_dict in dict_list]
+
+    if grid is None:
+        num_points = max(len(sweep) for sweep in sweeps)
+        grid = np.linspace(
+            min(np.min(sweep) for sweep in sweeps),
+            max(np.max(sweep) for sweep in sweeps),
+            num_points,
+        )
+
+    order = np.argsort(step_values, kind="stable")
+    z = interpolate_rows(grid, [sweeps[i] for i in order], [values[i] for i in order])
+    return grid, step_values[order], z
+
+
+def get_window_mask(z: np.ndarray, target: float = BER_TARGET) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return z <= target
+
+
+def get_window_area(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Area of the operating window of each map in square microamps."""
+    mask = mask.reshape((-1,) + mask.shape[-2:])
+    dx = np.abs(np.gradient(np.atleast_2d(x), axis=-1))
+    dy = np.abs(np.gradient(np.atleast_2d(y), axis=-1))
+    dx = np.broadcast_to(dx, (len(mask), mask.shape[-1]))
+    dy = np.broadcast_to(dy, (len(mask), mask.shape[-2]))
+    area = np.einsum("nij,ni,nj->n", mask.astype(float), dy, dx)
+    return area
+
+
+def get_window_depth(mask: np.ndarray) -> np.ndarray:
+    """Number of grid steps from each point to the nearest window edge.
+
+    Each map in the stack is eroded independently, so the depth of a point
+    is its chessboard distance to the closest point outside the window.
+    """
+    from scipy.ndimage import binary_erosion
+
+    mask = mask.reshape((-1,) + mask.shape[-2:])
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = True
+
+    depth = np.zeros(mask.shape, dtype=int)
+    eroded = mask.copy()
+    while eroded.any():
+        depth += eroded
+        eroded = binary_erosion(eroded, structure=structure, border_value=0)
+    return depth
+
+
+def get_window_optimum(
+    x: np.ndarray, y: np.ndarray, z: np.ndarray, depth: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Locate the optimum operating point of each map.
+
+    The optimum is the point deepest inside the operating window, with ties
+    broken by the lowest bit error rate. Maps without a window return NaN.
+    """
+    x = np.atleast_2d(x)
+    y = np.atleast_2d(y)
+    z = z.reshape((-1,) + z.shape[-2:])
+    depth = depth.reshape(z.shape)
+
+    score = np.where(depth > 0, depth - 0.5 * np.nan_to_num(z, nan=1.0), -np.inf)
+    flat_index = np.argmax(score.reshape(len(z), -1), axis=1)
+    row, col = np.unravel_index(flat_index, z.shape[-2:])
+    maps = np.arange(len(z))
+
+    has_window = depth.reshape(len(z), -1).max(axis=1) > 0
+    optimum_x = np.where(has_window, x[maps % len(x), col], np.nan)
+    optimum_y = np.where(has_window, y[maps % len(y), row], np.nan)
+    optimum_z = np.where(has_window, z[maps, row, col], np.nan)
+    return optimum_x, optimum_y, optimum_z
+
+
+def get_window_contours(
+    x: np.ndarray, y: np.ndarray, z: np.ndarray, target: float = BER_TARGET
+) -> list[list[np.ndarray]]:
+    """Contour lines of each map at the target bit error rate."""
+    from contourpy import contour_generator
+
+    x = np.atleast_2d(x)
+    y = np.atleast_2d(y)
+    z = z.reshape((-1,) + z.shape[-2:])
+    contours = []
+    for i, zarray in enumerate(z):
+        generator = contour_generator(
+            x[i % len(x)], y[i % len(y)], np.ma.masked_invalid(zarray)
+        )
+        contours.append(generator.lines(target))
+    return contours
+
+
+def analyze_operating_windows(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    target: float = BER_TARGET,
+    contours: bool = True,
+) -> dict:
+    """Operating-window summary for a stack of 2-D bit error rate maps.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Column coordinates, shape (nx,) shared by all maps or (n_maps, nx).
+    y : np.ndarray
+        Row coordinates, shape (ny,) shared by all maps or (n_maps, ny).
+    z : np.ndarray
+        Bit error rate maps, shape (ny, nx) or (n_maps, ny, nx).
+    target : float
+        The bit error rate below which a point is inside the window.
+    contours : bool
+        Whether to extract the window contour lines.
+
+    Returns
+    -------
+    window : dict
+        Per-map arrays of the window mask, area, depth and optimum point.
+    """
+    z = z.reshape((-1,) + z.shape[-2:])
+    mask = get_window_mask(z, target)
+    depth = get_window_depth(mask)
+    optimum_x, optimum_y, optimum_z = get_window_optimum(x, y, z, depth)
+    window = {
+        "target": target,
+        "mask": mask,
+        "area": get_window_area(x, y, mask),
+        "depth": depth,
+        "optimum_x": optimum_x,
+        "optimum_y": optimum_y,
+        "optimum_bit_error_rate": optimum_z,
+    }
+    if contours:
+        window["contours"] = get_window_contours(x, y, z, target)
+    return window
+
+
+def get_optimum_currents(
+    window: dict, x_name: str, y_name: str, index: int = 0
+) -> dict:
+    """Express one optimum point in the units and keys of ``CELLS``."""
+    return {
+        x_name: window["optimum_x"][index] * 1e-6,
+        y_name: window["optimum_y"][index] * 1e-6,
+        "min_bit_error_rate": window["optimum_bit_error_rate"][index],
+    }
@@ -0,0 +1,178 @@
+from typing import Literal
+
+import numpy as np
+
+from .confidence import CONFIDENCE_LEVEL, get_num_shots
+
+# Scale of the stored delay to seconds, delays are saved in ms
+DELAY_SCALE = 1e-3
+
+# Each model is linear in log10(BER) against a transform of the delay
+DECAY_MODELS = {
+    "power": np.log10,
+    "exponential": lambda delay: delay,
+}
+
+
+def transform_delay(delay: np.ndarray, model: str) -> np.ndarray:
+    """Delay transformed for a decay model, NaN where the model is undefined.
+
+    The power model has no value at delays of zero or below.
+    """
+    delay = np.asarray(delay, dtype=float)
+    if model == "power":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(delay > 0, np.log10(delay), np.nan)
+    return DECAY_MODELS[model](delay)
+
+
+def get_delay_sweep(dict_list: list[dict], delay_scale: float = DELAY_SCALE) -> dict:
+    """Stack a retention sweep of one file per delay, sorted by delay.
+
+    Each file may hold several operating points, e.g. cells or read
+    currents, which become the columns of the stacked arrays.
+
+    Returns
+    -------
+    delay_sweep : dict
+        ``delay`` in seconds, shape (num_delays,), ``bit_error_rate`` with
+        shape (num_delays, num_points) and ``num_shots`` per delay.
+    """
+    if not dict_list:
+        return {
+            "delay": np.array([]),
+            "bit_error_rate": np.empty((0, 1)),
+            "num_shots": np.array([], dtype=int),
+        }
+    delay = np.array([data_dict["delay"].flat[0] for data_dict in dict_list])
+    delay = delay * delay_scale
+    bit_error_rate = np.stack(
+        [np.ravel(data_dict["bit_error_rate"]) for data_dict in dict_list]
+    ).astype(float)
+    num_shots = np.array([get_num_shots(data_dict) for data_dict in dict_list])
+
+    order = np.argsort(delay, kind="stable")
+    return {
+        "delay": delay[order],
+        "bit_error_rate": bit_error_rate[order],
+        "num_shots": num_shots[order],
+    }
+
+
+def fit_decay(
+    delay: np.ndarray,
+    bit_error_rate: np.ndarray,
+    num_shots: np.ndarray,
+    model: Literal["power", "exponential"] = "power",
+) -> dict:
+    """Weighted fit of log10(BER) against the delay for every operating point.
+
+    ``power`` fits BER = 10**intercept * delay**slope, skipping delays of
+    zero, and ``exponential`` fits BER = 10**(intercept + slope * delay). Each point is weighted by
+    the inverse binomial variance of its log10(BER); points with no errors
+    or only errors carry no weight. All columns are solved at once from
+    their 2x2 normal equations.
+
+    Parameters
+    ----------
+    delay : np.ndarray
+        Delays in seconds, shape (num_delays,).
+    bit_error_rate : np.ndarray
+        Shape (num_delays, num_points), or (num_delays,) for one point.
+    num_shots : np.ndarray
+        Bits behind each rate, broadcastable to ``bit_error_rate``.
+
+    Returns
+    -------
+    fit : dict
+        ``slope`` and ``intercept`` per point, their ``covariance`` in
+        that order, shape (num_points, 2, 2), scaled by the reduced
+        chi-square when it exceeds one, the ``reduced_chi2`` and
+        ``num_fitted`` points.
+    """
+    p = np.asarray(bit_error_rate, dtype=float)
+    if p.ndim == 1:
+        p = p[:, None]
+    n = np.broadcast_to(np.asarray(num_shots, dtype=float).reshape(-1, 1), p.shape)
+    x = transform_delay(delay, model)
+    x = np.broadcast_to(x[:, None], p.shape)
+
+    usable = (p > 0) & (p < 1) & np.isfinite(x)
+    x = np.where(usable, x, 0.0)
+    safe = np.where(usable, p, 0.5)
+    # Var(log10 p) = (1 - p) / (n p ln(10)^2) by the delta method
+    weight = np.where(usable, n * safe * np.log(10) ** 2 / (1 - safe), 0.0)
+    y = np.log10(safe)
+
+    s = weight.sum(axis=0)
+    sx = (weight * x).sum(axis=0)
+    sy = (weight * y).sum(axis=0)
+    sxx = (weight * x**2).sum(axis=0)
+    sxy = (weight * x * y).sum(axis=0)
+    determinant = s * sxx - sx**2
+    num_fitted = usable.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (s * sxy - sx * sy) / determinant
+        intercept = (sxx * sy - sx * sxy) / determinant
+        residual = y - intercept - slope * x
+        chi2 = (weight * residual**2).sum(axis=0)
+        reduced_chi2 = np.where(num_fitted > 2, chi2 / (num_fitted - 2), np.nan)
+        covariance = np.stack(
+            [np.stack([s, -sx], axis=-1), np.stack([-sx, sxx], axis=-1)], axis=-2
+        ) / determinant[:, None, None]
+
+    scale = np.where(np.isfinite(reduced_chi2), np.maximum(reduced_chi2, 1), 1)
+    solvable = (num_fitted >= 2) & (determinant > 0)
+    nan = np.full_like(slope, np.nan)
+    return {
+        "model": model,
+        "slope": np.where(solvable, slope, nan),
+        "intercept": np.where(solvable, intercept, nan),
+        "covariance": np.where(
+            solvable[:, None, None], covariance * scale[:, None, None], np.nan
+        ),
+        "reduced_chi2": reduced_chi2,
+        "num_fitted": num_fitted,
+    }
+
+
+def predict_decay(
+    fit: dict, delay: np.ndarray, confidence: float = CONFIDENCE_LEVEL
+) -> dict:
+    """Fitted BER at the given delays with a confidence band.
+
+    Returns
+    -------
+    prediction : dict
+        ``bit_error_rate``, ``lower`` and ``upper``, each of shape
+        (num_delays, num_points), NaN at delays the model does not cover.
+    """
+    from scipy.special import ndtri
+
+    x = transform_delay(delay, fit["model"])[:, None]
+    log_ber = fit["intercept"] + fit["slope"] * x
+    covariance = fit["covariance"]
+    # Variance of intercept + slope * x from the parameter covariance
+    variance = (
+        covariance[:, 1, 1] + 2 * x * covariance[:, 0, 1] + x**2 * covariance[:, 0, 0]
+    )
+    half_width = ndtri(0.5 + confidence / 2) * np.sqrt(np.maximum(variance, 0))
+    return {
+        "bit_error_rate": 10**log_ber,
+        "lower": 10 ** (log_ber - half_width),
+        "upper": 10 ** (log_ber + half_width),
+    }
+
+
+def analyze_retention(
+    dict_list: list[dict], model: Literal["power", "exponential"] = "power"
+) -> dict:
+    """Delay sweep of the files with the decay fit of each operating point."""
+    delay_sweep = get_delay_sweep(dict_list)
+    delay_sweep["fit"] = fit_decay(
+        delay_sweep["delay"],
+        delay_sweep["bit_error_rate"],
+        delay_sweep["num_shots"],
+        model,
+    )
+    return delay_sweep
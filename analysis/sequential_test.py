@@ -0,0 +1,186 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .confidence import get_num_shots
+from .operating_window import BER_TARGET
+
+# The rates tested against each other are the target divided and multiplied
+# by this factor, rates in between may be decided either way
+INDIFFERENCE_FACTOR = 2.0
+# Probability of calling a point below target when it is above, and the reverse
+ERROR_PROBABILITY = 0.01
+# Shots of each written bit between two decisions
+CHECK_SHOTS = 50
+
+BELOW_TARGET = -1
+UNDECIDED = 0
+ABOVE_TARGET = 1
+
+
+def get_sprt_bounds(error_probability: float = ERROR_PROBABILITY) -> tuple:
+    """Wald's log likelihood ratio bounds for equal error probabilities."""
+    upper = np.log((1 - error_probability) / error_probability)
+    return -upper, upper
+
+
+@dataclass
+class SequentialTest:
+    """Wald sequential probability ratio test of many points against a target.
+
+    Each point tests BER = target / factor against BER = target * factor
+    from streaming error counts. A point is decided as soon as its log
+    likelihood ratio leaves the bounds, so points far from the target stop
+    after few shots. Points still undecided after ``max_shots`` fall back
+    to comparing the counted rate with the target.
+
+    Attributes
+    ----------
+    num_points : int
+        Points tested in parallel.
+    target : float
+        BER a point must not exceed.
+    max_shots : int, optional
+        Shot budget of each point, e.g. ``2 * num_meas``.
+    bit_errors, num_shots : np.ndarray
+        Counts so far, frozen once a point is decided.
+    decision : np.ndarray
+        BELOW_TARGET, ABOVE_TARGET or UNDECIDED for each point.
+    """
+
+    num_points: int
+    target: float = BER_TARGET
+    max_shots: Optional[int] = None
+    factor: float = INDIFFERENCE_FACTOR
+    error_probability: float = ERROR_PROBABILITY
+    bit_errors: np.ndarray = field(init=False)
+    num_shots: np.ndarray = field(init=False)
+    decision: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        self.bit_errors = np.zeros(self.num_points, dtype=np.int64)
+        self.num_shots = np.zeros(self.num_points, dtype=np.int64)
+        self.decision = np.full(self.num_points, UNDECIDED)
+        p0 = self.target / self.factor
+        p1 = min(self.target * self.factor, 0.5)
+        self.error_weight = np.log(p1 / p0)
+        self.success_weight = np.log((1 - p1) / (1 - p0))
+        self.bounds = get_sprt_bounds(self.error_probability)
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.decision == UNDECIDED
+
+    @property
+    def log_likelihood_ratio(self) -> np.ndarray:
+        successes = self.num_shots - self.bit_errors
+        return self.bit_errors * self.error_weight + successes * self.success_weight
+
+    @property
+    def bit_error_rate(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.bit_errors / self.num_shots
+
+    def update(self, bit_errors: np.ndarray, num_shots: np.ndarray) -> np.ndarray:
+        """Add new counts to the undecided points and return the decisions."""
+        active = self.active
+        self.bit_errors += np.where(active, bit_errors, 0)
+        self.num_shots += np.where(active, num_shots, 0)
+
+        ratio = self.log_likelihood_ratio
+        lower, upper = self.bounds
+        self.decision = np.where(active & (ratio <= lower), BELOW_TARGET, self.decision)
+        self.decision = np.where(active & (ratio >= upper), ABOVE_TARGET, self.decision)
+        if self.max_shots is not None:
+            exhausted = self.active & (self.num_shots >= self.max_shots)
+            fallback = np.where(
+                self.bit_error_rate <= self.target, BELOW_TARGET, ABOVE_TARGET
+            )
+            self.decision = np.where(exhausted, fallback, self.decision)
+        return self.decision
+
+
+def replay_counts(
+    write_0_read_1: np.ndarray,
+    write_1_read_0: np.ndarray,
+    num_meas: int,
+    target: float = BER_TARGET,
+    check_shots: int = CHECK_SHOTS,
+    seed: Optional[int] = None,
+    **kwargs,
+) -> dict:
+    """Replay stored error counts through a sequential test.
+
+    The shots of each written bit are drawn in batches without
+    replacement from the stored ``num_meas`` shots, so the number of
+    errors in each batch is hypergeometric and the full run reproduces
+    the stored counts.
+
+    Returns
+    -------
+    replay : dict
+        ``decision`` and ``num_shots`` used per point, the ``full_decision``
+        of the stored counts, the fraction of decisions that ``agree``
+        with it and the fraction of ``shots_saved``.
+    """
+    rng = np.random.default_rng(seed)
+    errors = np.stack([np.ravel(write_0_read_1), np.ravel(write_1_read_0)])
+    errors = errors.astype(np.int64)
+    num_points = errors.shape[1]
+    remaining_errors = errors.copy()
+    remaining_shots = np.full_like(errors, num_meas)
+    test = SequentialTest(num_points, target, max_shots=2 * num_meas, **kwargs)
+
+    while test.active.any():
+        draw = np.minimum(check_shots, remaining_shots) * test.active
+        new_errors = np.zeros_like(errors)
+        drawing = draw > 0
+        new_errors[drawing] = rng.hypergeometric(
+            remaining_errors[drawing],
+            remaining_shots[drawing] - remaining_errors[drawing],
+            draw[drawing],
+        )
+        remaining_errors -= new_errors
+        remaining_shots -= draw
+        test.update(new_errors.sum(axis=0), draw.sum(axis=0))
+
+    bit_error_rate = errors.sum(axis=0) / (2 * num_meas)
+    full_decision = np.where(bit_error_rate <= target, BELOW_TARGET, ABOVE_TARGET)
+    total_shots = 2 * num_meas * num_points
+    return {
+        "decision": test.decision,
+        "num_shots": test.num_shots,
+        "full_decision": full_decision,
+        "agree": float(np.mean(test.decision == full_decision)) if num_points else 1.0,
+        "shots_saved": float(1 - test.num_shots.sum() / total_shots) if num_points else 0.0,
+    }
+
+
+def replay_data_dict(data_dict: dict, **kwargs) -> dict:
+    """Replay every point of a measurement file."""
+    return replay_counts(
+        data_dict["write_0_read_1"],
+        data_dict["write_1_read_0"],
+        get_num_shots(data_dict) // 2,
+        **kwargs,
+    )
+
+
+def replay_directory(dict_list: list[dict], **kwargs) -> dict:
+    """Replay a list of files and total the shots used and saved."""
+    replays = [replay_data_dict(data_dict, **kwargs) for data_dict in dict_list]
+    used = sum(int(replay["num_shots"].sum()) for replay in replays)
+    total = sum(
+        get_num_shots(data_dict) * np.size(data_dict["write_0_read_1"])
+        for data_dict in dict_list
+    )
+    decisions = np.concatenate([replay["decision"] for replay in replays])
+    full = np.concatenate([replay["full_decision"] for replay in replays])
+    return {
+        "replays": replays,
+        "num_shots": used,
+        "total_shots": total,
+        "shots_saved": 1 - used / total if total else 0.0,
+        "agree": float(np.mean(decisions == full)) if len(full) else 1.0,
+    }
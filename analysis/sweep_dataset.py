@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+SWEEP_CURRENTS = [
+    "write_current",
+    "read_current",
+    "enable_write_current",
+    "enable_read_current",
+]
+
+
+@dataclass
+class SweepDataset:
+    """Named coordinate axes over the points of one measurement sweep.
+
+    The measurement stores every quantity flattened along its last axis, with
+    the y sweep varying fastest. The axes are inferred once from ``x`` and
+    ``y`` and named after the current setting that matches them, so the
+    quantities can be viewed as N-D arrays without copying.
+
+    Attributes
+    ----------
+    data_dict : dict
+        The loaded measurement, referenced rather than copied.
+    axis_names : dict
+        Name of the coordinate stored in ``x`` and in ``y``.
+    coords : dict
+        The values of each axis in microamps, in measurement order.
+    dims : tuple
+        Names of the axes with more than one point, slowest varying last.
+    """
+
+    data_dict: dict
+    axis_names: dict
+    coords: dict
+    dims: tuple = field(init=False)
+
+    def __post_init__(self):
+        self.dims = tuple(
+            self.axis_names[axis]
+            for axis in ("y", "x")
+            if len(self.coords[self.axis_names[axis]]) > 1
+        )
+
+    @classmethod
+    def from_data_dict(cls, data_dict: dict) -> "SweepDataset":
+        axis_values = {
+            axis: _get_axis_values(data_dict, axis) for axis in ("x", "y")
+        }
+        axis_names = {}
+        coords = {}
+        for axis, values in axis_values.items():
+            name = _match_axis_name(data_dict, values, exclude=axis_names.values())
+            if name is None:
+                name = axis
+            axis_names[axis] = name
+            coords[name] = values
+        return cls(data_dict, axis_names, coords)
+
+    @property
+    def grid_shape(self) -> tuple:
+        return (
+            len(self.coords[self.axis_names["y"]]),
+            len(self.coords[self.axis_names["x"]]),
+        )
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(self.coords[dim]) for dim in self.dims)
+
+    @property
+    def num_points(self) -> int:
+        return int(np.prod(self.grid_shape))
+
+    def grid(self, name: str) -> np.ndarray:
+        """View of a quantity on the full (y, x) grid, leading axes kept."""
+        value = np.asarray(self.data_dict[name])
+        if value.size == self.num_points:
+            value = value.reshape(self.num_points)
+        if value.shape[-1] != self.num_points:
+            raise ValueError(
+                f"{name} has {value.shape[-1]} points, expected {self.num_points}"
+            )
+        ylength, xlength = self.grid_shape
+        value = value.reshape(value.shape[:-1] + (xlength, ylength))
+        return np.swapaxes(value, -1, -2)
+
+    def values(self, name: str) -> np.ndarray:
+        """View of a quantity with one axis per entry of ``dims``.
+
+        Leading singleton axes of the stored array are dropped; other leading
+        axes, such as the shots of ``read_zero_top``, are kept in front.
+        """
+        value = self.grid(name)
+        prefix = tuple(size for size in value.shape[:-2] if size != 1)
+        return value.reshape(prefix + self.shape)
+
+    def coord(self, name: str) -> np.ndarray:
+        if name in self.coords:
+            return self.coords[name]
+        return np.asarray(self.data_dict[name]).flatten()[:1] * 1e6
+
+    def axis(self, dim: str) -> int:
+        """Position of a named axis counted from the end of ``values``."""
+        return self.dims.index(dim) - len(self.dims)
+
+    def isel(self, name: str, dim: str, index) -> np.ndarray:
+        value = self.values(name)
+        selection = [slice(None)] * value.ndim
+        selection[self.axis(dim)] = index
+        return value[tuple(selection)]
+
+    def reduce(self, name: str, func: Callable, dim: str) -> np.ndarray:
+        return func(self.values(name), axis=self.axis(dim))
+
+
+def get_sweep_dataset(data_dict: dict) -> SweepDataset:
+    """The sweep dataset of a loaded measurement, inferred on first use."""
+    dataset = data_dict.get("sweep_dataset")
+    if dataset is None:
+        dataset = SweepDataset.from_data_dict(data_dict)
+        data_dict["sweep_dataset"] = dataset
+    return dataset
+
+
+def _get_axis_values(data_dict: dict, axis: str) -> np.ndarray:
+    value = np.asarray(data_dict.get(axis))
+    if value.ndim == 3:
+        value = value[0][:, 0]
+    else:
+        value = value.flatten()
+
+    length = data_dict.get(f"sweep_{axis}_len")
+    if length is not None:
+        value = value[: int(np.asarray(length).flatten()[0])]
+    return value * 1e6
+
+
+def _match_axis_name(data_dict: dict, values: np.ndarray, exclude) -> str:
+    if len(values) < 2:
+        return None
+    for name in SWEEP_CURRENTS:
+        if name in exclude or data_dict.get(name) is None:
+            continue
+        setting = np.unique(np.asarray(data_dict[name]) * 1e6)
+        if len(setting) == len(np.unique(values)) and np.allclose(
+            setting, np.unique(values)
+        ):
+            return name
+    return None
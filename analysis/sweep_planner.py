@@ -0,0 +1,255 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+from .data_processing import (
+    get_bit_error_rate,
+    get_bit_error_rate_args,
+    get_enable_current_sweep,
+)
+
+# Levels separating the nominal, 0.5 plateau and inverting regions, as in
+# get_bit_error_rate_args
+NOMINAL_LEVEL = 0.45
+INVERTING_LEVEL = 0.55
+# Points this far from 0.5 are taken to be on the edge of a feature
+PLATEAU_TOLERANCE = 0.015
+# Grid steps between the points of the initial coarse pass, at least
+INITIAL_STRIDE = 4
+# Points of the initial coarse pass on fine grids, where the stride grows
+INITIAL_POINTS = 12
+# Grid steps beyond each window edge measured by the final check pass
+CHECK_STRIDE = 2
+# Points proposed per round
+BATCH_SIZE = 4
+
+
+def get_region(bit_error_rate: np.ndarray) -> np.ndarray:
+    """-1 for nominal, 0 for the 0.5 plateau and 1 for inverting points."""
+    bit_error_rate = np.asarray(bit_error_rate, dtype=float)
+    return np.where(
+        bit_error_rate < NOMINAL_LEVEL,
+        -1,
+        np.where(bit_error_rate > INVERTING_LEVEL, 1, 0),
+    )
+
+
+def get_initial_indices(num_grid: int, stride: int = INITIAL_STRIDE) -> np.ndarray:
+    """Evenly spaced grid indices that always include both ends."""
+    return np.unique(np.append(np.arange(0, num_grid, stride), num_grid - 1))
+
+
+def propose_indices(
+    measured: np.ndarray,
+    bit_error_rate: np.ndarray,
+    batch_size: int = BATCH_SIZE,
+    tolerance: float = PLATEAU_TOLERANCE,
+) -> np.ndarray:
+    """Next grid indices to measure given the points measured so far.
+
+    A gap between neighbouring measured points is refined when its ends
+    lie in different regions, so it holds a 0.45 or 0.55 crossing, or when
+    an end in the plateau region is off 0.5 by more than ``tolerance``, or
+    faces such a point, so a crossing may be close. Gaps on the flat
+    plateau and inside the nominal or inverting regions are left alone.
+    Crossing gaps are split first, then the widest; each is bisected.
+
+    Parameters
+    ----------
+    measured : np.ndarray
+        Sorted grid indices already measured.
+    bit_error_rate : np.ndarray
+        The rate at each measured index.
+
+    Returns
+    -------
+    indices : np.ndarray
+        Up to ``batch_size`` unmeasured grid indices, empty when every
+        transition is resolved to one grid step.
+    """
+    measured = np.asarray(measured)
+    bit_error_rate = np.asarray(bit_error_rate, dtype=float)
+    region = get_region(bit_error_rate)
+    off_plateau = np.abs(bit_error_rate - 0.5) > tolerance
+
+    width = np.diff(measured)
+    crossing = region[1:] != region[:-1]
+    # A plateau point next to an off-plateau one may hide a crossing between
+    feature = (off_plateau[1:] | off_plateau[:-1]) & (
+        (region[1:] == 0) | (region[:-1] == 0)
+    )
+    refine = (width > 1) & (crossing | feature)
+    if not refine.any():
+        return np.array([], dtype=int)
+
+    # Crossings first, then wider gaps
+    priority = np.where(refine, crossing * measured[-1] + width, -1)
+    gaps = np.argsort(-priority, kind="stable")[: min(batch_size, refine.sum())]
+    return np.sort(measured[gaps] + width[gaps] // 2)
+
+
+@dataclass
+class ReplayInstrument:
+    """Simulated instrument answering from a stored sweep.
+
+    Attributes
+    ----------
+    currents : np.ndarray
+        The swept current of each stored point, the grid of settings.
+    bit_error_rate : np.ndarray
+        The stored rate of each point.
+    measured : set
+        Grid indices requested so far.
+    """
+
+    currents: np.ndarray
+    bit_error_rate: np.ndarray
+    measured: set = field(default_factory=set)
+
+    @classmethod
+    def from_data_dict(cls, data_dict: dict) -> "ReplayInstrument":
+        return cls(get_enable_current_sweep(data_dict), get_bit_error_rate(data_dict))
+
+    def measure(self, indices: np.ndarray) -> np.ndarray:
+        self.measured.update(int(i) for i in indices)
+        return self.bit_error_rate[indices]
+
+
+def get_window_edges(indices: np.ndarray, bit_error_rate: np.ndarray) -> tuple:
+    """Grid indices of the first and last nominal and inverting points."""
+    args = get_bit_error_rate_args(np.asarray(bit_error_rate))
+    return tuple(np.nan if np.isnan(arg) else int(indices[arg]) for arg in args)
+
+
+def get_check_indices(
+    measured: np.ndarray,
+    bit_error_rate: np.ndarray,
+    num_grid: int,
+    stride: int = CHECK_STRIDE,
+    max_gap: int = INITIAL_STRIDE,
+) -> np.ndarray:
+    """Grid indices of the final check pass once no gap is left to refine.
+
+    A point of another region is missed when it sits in a gap whose ends
+    agree, and it moves a window edge. The check is a bounded probe: the
+    points ``stride`` steps beyond both sides of each window edge, and the
+    midpoint of each gap wider than ``max_gap`` between two neighbours in
+    the same nominal or inverting region.
+
+    Returns
+    -------
+    indices : np.ndarray
+        Unmeasured grid indices, empty when the check is complete.
+    """
+    measured = np.asarray(measured)
+    region = get_region(bit_error_rate)
+    edges = np.array(get_window_edges(measured, bit_error_rate), dtype=float)
+    edges = edges[~np.isnan(edges)].astype(int)
+    around = (edges[:, None] + np.array([-stride, stride])).ravel()
+
+    width = np.diff(measured)
+    same = (region[1:] == region[:-1]) & (region[1:] != 0) & (width > max_gap)
+    midpoints = measured[:-1][same] + width[same] // 2
+
+    candidates = np.concatenate([around, midpoints])
+    candidates = candidates[(candidates >= 0) & (candidates < num_grid)]
+    return np.setdiff1d(candidates, measured)
+
+
+def plan_sweep(
+    measure: Callable[[np.ndarray], np.ndarray],
+    currents: np.ndarray,
+    stride: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    max_points: Optional[int] = None,
+) -> dict:
+    """Measure a 1-D sweep adaptively on a grid of current settings.
+
+    Gaps are refined with ``propose_indices`` until none is left, then
+    ``get_check_indices`` is measured and refining resumes, until the
+    check finds nothing new. A feature narrower than the probes, such as
+    a single point of one region between two of another, can be missed.
+
+    Parameters
+    ----------
+    measure : Callable
+        Takes grid indices and returns the measured rates, e.g.
+        ``ReplayInstrument.measure``.
+    currents : np.ndarray
+        The current of each setting on the finest grid.
+    stride : int, optional
+        Grid steps of the initial pass. Defaults to about
+        ``INITIAL_POINTS`` points, and never less than ``INITIAL_STRIDE``.
+    max_points : int, optional
+        Stop after this many points.
+
+    Returns
+    -------
+    plan : dict
+        The measured ``indices`` in order, their ``currents`` and
+        ``bit_error_rate``, and the number of measurement ``rounds``.
+    """
+    currents = np.asarray(currents)
+    num_grid = len(currents)
+    if stride is None:
+        stride = max(INITIAL_STRIDE, num_grid // INITIAL_POINTS)
+    indices = get_initial_indices(num_grid, stride)
+    bit_error_rate = np.asarray(measure(indices), dtype=float)
+    rounds = 1
+    while max_points is None or len(indices) < max_points:
+        proposed = propose_indices(indices, bit_error_rate, batch_size)
+        if len(proposed) == 0:
+            proposed = get_check_indices(indices, bit_error_rate, num_grid)
+        if max_points is not None:
+            proposed = proposed[: max_points - len(indices)]
+        if len(proposed) == 0:
+            break
+        indices = np.concatenate([indices, proposed])
+        bit_error_rate = np.concatenate([bit_error_rate, measure(proposed)])
+        order = np.argsort(indices)
+        indices, bit_error_rate = indices[order], bit_error_rate[order]
+        rounds += 1
+    return {
+        "indices": indices,
+        "currents": currents[indices],
+        "bit_error_rate": bit_error_rate,
+        "rounds": rounds,
+    }
+
+
+def replay_sweep(data_dict: dict, **kwargs) -> dict:
+    """Run the planner against a stored sweep and compare with the full grid.
+
+    Returns
+    -------
+    replay : dict
+        The ``plan``, the ``num_points`` measured out of ``num_grid``, and
+        whether the window edges of the full sweep were ``recovered``.
+    """
+    instrument = ReplayInstrument.from_data_dict(data_dict)
+    num_grid = len(instrument.bit_error_rate)
+    plan = plan_sweep(instrument.measure, instrument.currents, **kwargs)
+    full_edges = get_window_edges(np.arange(num_grid), instrument.bit_error_rate)
+    edges = get_window_edges(plan["indices"], plan["bit_error_rate"])
+    return {
+        "plan": plan,
+        "currents": plan["currents"],
+        "num_points": len(instrument.measured),
+        "num_grid": num_grid,
+        "recovered": np.array_equal(edges, full_edges, equal_nan=True),
+    }
+
+
+def replay_directory(dict_list: list[dict], **kwargs) -> dict:
+    """Replay every sweep of a list and summarise the points saved."""
+    replays = [replay_sweep(data_dict, **kwargs) for data_dict in dict_list]
+    num_points = sum(replay["num_points"] for replay in replays)
+    num_grid = sum(replay["num_grid"] for replay in replays)
+    return {
+        "replays": replays,
+        "num_points": num_points,
+        "num_grid": num_grid,
+        "reduction": num_grid / num_points if num_points else np.nan,
+        "recovered": sum(replay["recovered"] for replay in replays),
+    }
@@ -0,0 +1,262 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from .calculations import calculate_channel_temperature
+from .constants import CELLS, CRITICAL_TEMP, HEATING_EXPONENT, SUBSTRATE_TEMP
+from .data_processing import get_current_cell, get_enable_fit, get_fitting_points
+
+TABLE_POINTS = 2048
+TABLE_MAX_FRACTION = 1.5
+# Enable response points above this fraction of the heater-off critical
+# current are on the plateau and carry no heating information, as in
+# get_enable_fit
+PLATEAU_FRACTION = 0.75
+
+
+def build_temperature_table(
+    ih_max: np.ndarray,
+    exponent: Union[float, np.ndarray] = HEATING_EXPONENT,
+    critical_temperature: float = CRITICAL_TEMP,
+    substrate_temperature: float = SUBSTRATE_TEMP,
+    num_points: int = TABLE_POINTS,
+) -> dict:
+    """Precompute the channel temperature model for many cells.
+
+    The table is sampled on a uniform grid of the normalized enable current
+    ``ih / ih_max`` from zero to ``TABLE_MAX_FRACTION``, one row per cell.
+
+    Parameters
+    ----------
+    ih_max : np.ndarray
+        The enable current that suppresses the critical current to zero
+        for each cell, in microamps.
+    exponent : float or np.ndarray
+        The power-law heating exponent N, shared or one per cell.
+
+    Returns
+    -------
+    table : dict
+        The grid, per-cell ``ih_max`` and ``exponent``, and the temperature
+        rows of shape (n_cells, num_points).
+    """
+    ih_max = np.atleast_1d(np.asarray(ih_max, dtype=float))
+    exponent = np.broadcast_to(np.asarray(exponent, dtype=float), ih_max.shape)
+    fraction = np.linspace(0, TABLE_MAX_FRACTION, num_points)
+    temperature = calculate_channel_temperature(
+        critical_temperature,
+        substrate_temperature,
+        fraction[None, :],
+        1.0,
+        exponent[:, None],
+    )
+    return {
+        "fraction": fraction,
+        "ih_max": ih_max,
+        "exponent": exponent,
+        "temperature": temperature,
+    }
+
+
+def build_cell_temperature_tables(
+    cells: dict = CELLS,
+    exponent: Union[float, np.ndarray] = HEATING_EXPONENT,
+    num_points: int = TABLE_POINTS,
+) -> dict:
+    """Temperature table with one row per cell of ``CELLS``."""
+    names = list(cells)
+    ih_max = np.array([cells[name]["x_intercept"] for name in names])
+    table = build_temperature_table(ih_max, exponent, num_points=num_points)
+    table["cells"] = names
+    return table
+
+
+def get_table_rows(table: dict, cell: Union[str, list[str]]) -> np.ndarray:
+    names = [cell] if isinstance(cell, str) else cell
+    return np.array([table["cells"].index(name) for name in names])
+
+
+def lookup_channel_temperature(
+    table: dict, enable_current: np.ndarray, rows: np.ndarray = None
+) -> np.ndarray:
+    """Channel temperature for enable currents by linear table interpolation.
+
+    ``enable_current`` broadcasts against ``rows``, the table row of each
+    current. Without ``rows`` the last axis of ``enable_current`` must match
+    the number of table rows. Currents beyond the table return NaN.
+    """
+    enable_current = np.asarray(enable_current, dtype=float)
+    if rows is None:
+        rows = np.arange(len(table["ih_max"]))
+    rows, enable_current = np.broadcast_arrays(rows, enable_current)
+
+    fraction = table["fraction"]
+    step = fraction[1] - fraction[0]
+    position = enable_current / table["ih_max"][rows] / step
+    index = np.clip(np.floor(position).astype(int), 0, len(fraction) - 2)
+    weight = position - index
+
+    temperature = table["temperature"]
+    result = (1 - weight) * temperature[rows, index] + weight * temperature[
+        rows, index + 1
+    ]
+    outside = (position < 0) | (position > len(fraction) - 1)
+    return np.where(outside, np.nan, result)
+
+
+def lookup_enable_current(
+    table: dict, channel_temperature: np.ndarray, rows: np.ndarray = None
+) -> np.ndarray:
+    """Enable current that heats the channel to a target temperature.
+
+    All rows are searched in one ``np.searchsorted`` call by shifting each
+    monotonic temperature row onto its own interval. Temperatures outside a
+    row's range return NaN.
+    """
+    channel_temperature = np.asarray(channel_temperature, dtype=float)
+    if rows is None:
+        rows = np.arange(len(table["ih_max"]))
+    rows, channel_temperature = np.broadcast_arrays(rows, channel_temperature)
+
+    temperature = table["temperature"]
+    num_rows, num_points = temperature.shape
+    span = temperature.max() - temperature.min() + 1.0
+    offsets = np.arange(num_rows) * span
+
+    flat = (temperature + offsets[:, None]).ravel()
+    target = channel_temperature + offsets[rows]
+    index = np.searchsorted(flat, target, side="right") - 1
+    index = np.clip(index - rows * num_points, 0, num_points - 2)
+
+    t0 = temperature[rows, index]
+    t1 = temperature[rows, index + 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(t1 > t0, (channel_temperature - t0) / (t1 - t0), 0.0)
+    fraction = table["fraction"]
+    enable_fraction = fraction[index] + weight * (fraction[index + 1] - fraction[index])
+    enable_current = enable_fraction * table["ih_max"][rows]
+
+    outside = (channel_temperature < temperature[rows, 0]) | (
+        channel_temperature > temperature[rows, -1]
+    )
+    return np.where(outside, np.nan, enable_current)
+
+
+def fit_temperature_exponent(
+    enable_current: np.ndarray,
+    channel_temperature: np.ndarray,
+    ih_max: np.ndarray,
+    critical_temperature: float = CRITICAL_TEMP,
+    substrate_temperature: float = SUBSTRATE_TEMP,
+) -> np.ndarray:
+    """Least-squares fit of the heating exponent N for many cells at once.
+
+    The model is linear in log space,
+    ``log((T^4 - Ts^4) / (Tc^4 - Ts^4)) = N log(ih / ih_max)``, so every cell
+    is fitted in closed form. Inputs have shape (n_cells, n_points) and may
+    contain NaN for missing points.
+
+    Returns
+    -------
+    exponent : np.ndarray
+        The fitted exponent of each cell, shape (n_cells,).
+    """
+    enable_current = np.atleast_2d(np.asarray(enable_current, dtype=float))
+    channel_temperature = np.atleast_2d(np.asarray(channel_temperature, dtype=float))
+    ih_max = np.asarray(ih_max, dtype=float).reshape(-1, 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = np.log(enable_current / ih_max)
+        y = np.log(
+            (channel_temperature**4 - substrate_temperature**4)
+            / (critical_temperature**4 - substrate_temperature**4)
+        )
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        exponent = np.sum(x * y, axis=1) / np.sum(x * x, axis=1)
+    return exponent
+
+
+def calculate_temperature_from_critical_current(
+    critical_current: np.ndarray,
+    heater_off_current: np.ndarray,
+    critical_temperature: float = CRITICAL_TEMP,
+    substrate_temperature: float = SUBSTRATE_TEMP,
+) -> np.ndarray:
+    """Channel temperature at which the channel has a given critical current.
+
+    Inverts the Ginzburg-Landau depairing law
+    ``Ic(T) = Ic(0) (1 - (T / Tc)^2)^(3/2)``, with ``Ic(0)`` scaled from the
+    critical current with the heater off, measured at the substrate
+    temperature. Currents above the heater-off value return the substrate
+    temperature and currents at or below zero the critical temperature.
+    """
+    critical_current = np.asarray(critical_current, dtype=float)
+    heater_off_current = np.asarray(heater_off_current, dtype=float)
+    zero_temperature_current = heater_off_current / (
+        1 - (substrate_temperature / critical_temperature) ** 2
+    ) ** 1.5
+    fraction = np.clip(critical_current / zero_temperature_current, 0, 1)
+    temperature = critical_temperature * np.sqrt(1 - fraction ** (2 / 3))
+    return np.maximum(temperature, substrate_temperature)
+
+
+def _get_usable_enable_fit(data_dict: dict) -> Optional[dict]:
+    """``get_enable_fit`` of a map, None when it has too few points below the
+    plateau for the linear fit, e.g. no half-maximum crossing at all."""
+    _, yfit = get_fitting_points(data_dict["x"][0], data_dict["y"][0], data_dict["ztotal"])
+    if len(yfit) == 0 or np.count_nonzero(yfit < PLATEAU_FRACTION * yfit[0]) < 2:
+        return None
+    return get_enable_fit(data_dict)
+
+
+def fit_enable_response_exponents(
+    dict_list: list[dict], plateau_fraction: float = PLATEAU_FRACTION
+) -> dict:
+    """Fit the heating exponent of each cell from its enable response map.
+
+    The half-maximum points of each map give the critical current at each
+    enable current. Points below the plateau are converted to channel
+    temperatures with ``calculate_temperature_from_critical_current`` and
+    all cells are fitted in one ``fit_temperature_exponent`` call, with
+    ``ih_max`` the zero crossing of the linear enable fit. Maps without a
+    usable fit get NaN.
+
+    Parameters
+    ----------
+    dict_list : list[dict]
+        Enable response maps with ``x``, ``y``, ``ztotal`` and ``cell``, as
+        in ``data/sup_figure1``.
+
+    Returns
+    -------
+    fit : dict
+        The ``cells``, their ``ih_max`` and fitted ``exponent``, and the
+        ``num_points`` used per cell.
+    """
+    fits = [_get_usable_enable_fit(data_dict) for data_dict in dict_list]
+    length = max((len(fit["xfit"]) for fit in fits if fit is not None), default=0)
+    enable_current = np.full((len(fits), length), np.nan)
+    channel_temperature = np.full((len(fits), length), np.nan)
+    for i, fit in enumerate(fits):
+        if fit is None:
+            continue
+        xfit, yfit = fit["xfit"], fit["yfit"]
+        heated = (xfit > 0) & (yfit < plateau_fraction * yfit[0])
+        enable_current[i, : heated.sum()] = xfit[heated]
+        channel_temperature[i, : heated.sum()] = (
+            calculate_temperature_from_critical_current(yfit[heated], yfit[0])
+        )
+
+    ih_max = np.array([np.nan if fit is None else fit["x_intercept"] for fit in fits])
+    return {
+        "cells": [str(get_current_cell(data_dict)) for data_dict in dict_list],
+        "ih_max": ih_max,
+        "exponent": fit_temperature_exponent(
+            enable_current, channel_temperature, ih_max
+        ),
+        "num_points": np.count_nonzero(np.isfinite(enable_current), axis=1),
+    }
@@ -0,0 +1,249 @@
+import os
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+
+from .data_processing import get_read_voltages
+from .file_utils import get_file_names, load_file
+
+POLARITY_KEYS = ["read_zero_top", "read_one_top", "threshold_bert", "bit_error_rate"]
+
+
+def get_error_curve(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Bit error rate for every distinct threshold of each sweep point.
+
+    The read 0 and read 1 shots of each point are sorted together once.
+    Then a cumulative count gives the errors of the threshold just above
+    each sorted shot. A read 0 above the threshold is a write 0 read 1
+    error, and a read 1 below it is a write 1 read 0 error, or the reverse
+    for the points where ``invert`` is set.
+
+    Parameters
+    ----------
+    read_zero, read_one : np.ndarray
+        Shot voltages, shape (num_points, num_shots0) and
+        (num_points, num_shots1).
+    invert : bool or np.ndarray
+        Polarity of all points or of each point, see ``count_errors``.
+
+    Returns
+    -------
+    voltages : np.ndarray
+        The sorted shots, shape (num_points, num_shots0 + num_shots1).
+    bit_error_rate : np.ndarray
+        BER of a threshold just below each sorted shot, plus one above all
+        shots. Shape (num_points, num_shots0 + num_shots1 + 1).
+    """
+    read_zero = np.asarray(read_zero, dtype=float)
+    read_one = np.asarray(read_one, dtype=float)
+    num_zero = read_zero.shape[-1]
+    num_one = read_one.shape[-1]
+
+    voltages = np.concatenate([read_zero, read_one], axis=-1)
+    order = np.argsort(voltages, axis=-1, kind="stable")
+    voltages = np.take_along_axis(voltages, order, axis=-1)
+    is_one = order >= num_zero
+
+    # Shots of each kind at or below each candidate threshold
+    zeros = np.zeros(voltages.shape[:-1] + (1,))
+    below_one = np.concatenate([zeros, np.cumsum(is_one, axis=-1)], axis=-1)
+    below_zero = np.arange(voltages.shape[-1] + 1) - below_one
+
+    invert = np.asarray(invert)[..., None]
+    write_0_read_1 = np.where(invert, below_zero, num_zero - below_zero) / num_zero
+    write_1_read_0 = np.where(invert, num_one - below_one, below_one) / num_one
+    return voltages, 0.5 * (write_0_read_1 + write_1_read_0)
+
+
+def search_optimal_threshold(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> dict:
+    """Threshold with the fewest counted errors for every sweep point.
+
+    Every shot changes the error count, so an optimal threshold spans a
+    single gap between neighbouring sorted shots and its middle is
+    returned. When separate gaps tie, the lowest one is used.
+
+    Returns
+    -------
+    result : dict
+        ``threshold`` and ``bit_error_rate`` per point, with
+        ``write_0_read_1`` and ``write_1_read_0`` as error counts.
+    """
+    voltages, curve = get_error_curve(read_zero, read_one, invert)
+    best = curve.min(axis=-1, keepdims=True)
+    optimal = np.isclose(curve, best, rtol=0, atol=1e-15)
+    first = np.argmax(optimal, axis=-1)[..., None]
+
+    # Candidate k lies between sorted shots k - 1 and k
+    padded = np.concatenate(
+        [voltages[..., :1] - 1e-3, voltages, voltages[..., -1:] + 1e-3], axis=-1
+    )
+    low = np.take_along_axis(padded, first, axis=-1)[..., 0]
+    high = np.take_along_axis(padded, first + 1, axis=-1)[..., 0]
+
+    num_zero = np.asarray(read_zero).shape[-1]
+    num_one = np.asarray(read_one).shape[-1]
+    threshold = 0.5 * (low + high)
+    write_0_read_1, write_1_read_0 = count_errors(
+        read_zero, read_one, threshold, invert
+    )
+    return {
+        "threshold": threshold,
+        "bit_error_rate": 0.5 * (write_0_read_1 / num_zero + write_1_read_0 / num_one),
+        "write_0_read_1": write_0_read_1,
+        "write_1_read_0": write_1_read_0,
+    }
+
+
+def count_errors(
+    read_zero: np.ndarray,
+    read_one: np.ndarray,
+    threshold: np.ndarray,
+    invert: Union[bool, np.ndarray] = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Write 0 read 1 and write 1 read 0 counts at a threshold per point.
+
+    With ``invert`` a read 0 below the threshold is the error, the
+    polarity some measurements (e.g. ``data/figure4/data``) were counted
+    with. It may be given per point.
+    """
+    threshold = np.asarray(threshold, dtype=float)[..., None]
+    read_zero = np.asarray(read_zero)
+    read_one = np.asarray(read_one)
+    invert = np.asarray(invert)[..., None]
+    errors0 = np.where(invert, read_zero <= threshold, read_zero > threshold)
+    errors1 = np.where(invert, read_one >= threshold, read_one < threshold)
+    return np.count_nonzero(errors0, axis=-1), np.count_nonzero(errors1, axis=-1)
+
+
+def recount_bit_error_rate(
+    data_dict: dict,
+    threshold: np.ndarray = None,
+    invert: Union[bool, np.ndarray] = False,
+) -> np.ndarray:
+    """BER of a measurement recounted from its shots at another threshold.
+
+    Defaults to the threshold used during the measurement.
+    """
+    read_zero, read_one = get_read_voltages(data_dict)
+    if threshold is None:
+        threshold = np.asarray(data_dict["threshold_bert"], dtype=float).ravel()
+    write_0_read_1, write_1_read_0 = count_errors(
+        read_zero, read_one, threshold, invert
+    )
+    return 0.5 * (
+        write_0_read_1 / read_zero.shape[-1] + write_1_read_0 / read_one.shape[-1]
+    )
+
+
+def detect_inverted(data_dict: dict) -> bool:
+    """Whether a measurement counted its errors with inverted polarity.
+
+    The shots are recounted at ``threshold_bert`` with both polarities and
+    compared with the stored ``bit_error_rate``.
+    """
+    stored = np.ravel(data_dict["bit_error_rate"])
+    mismatch = [
+        np.abs(recount_bit_error_rate(data_dict, invert=invert) - stored).sum()
+        for invert in (False, True)
+    ]
+    return bool(mismatch[1] < mismatch[0])
+
+
+def load_read_voltages(file_path: str) -> Tuple[list[str], list[tuple]]:
+    """Read 0 and read 1 shot voltages of every file in a directory."""
+    files = sorted(get_file_names(file_path))
+    voltages = [
+        get_read_voltages(
+            load_file(os.path.join(file_path, file), ["read_zero_top", "read_one_top"])
+        )
+        for file in files
+    ]
+    return files, voltages
+
+
+def apply_stacked(
+    files: list[str],
+    voltages: list[tuple],
+    func: Callable,
+    per_file: Optional[dict] = None,
+    **kwargs,
+) -> list[dict]:
+    """Run a per-point estimator once over the stacked points of many files.
+
+    Files whose read 0 and read 1 shot counts both match are concatenated
+    along the point axis, and the per-point results are split back per
+    file. ``per_file`` holds per-point arguments as one array per file,
+    stacked the same way.
+    """
+    per_file = per_file or {}
+    results = [None] * len(files)
+    groups = {}
+    for i, (read_zero, read_one) in enumerate(voltages):
+        groups.setdefault((read_zero.shape[-1], read_one.shape[-1]), []).append(i)
+    for members in groups.values():
+        stacked = {
+            name: np.concatenate([np.asarray(values[i]) for i in members])
+            for name, values in per_file.items()
+        }
+        result = func(
+            np.concatenate([voltages[i][0] for i in members]),
+            np.concatenate([voltages[i][1] for i in members]),
+            **stacked,
+            **kwargs,
+        )
+        bounds = np.cumsum([0] + [len(voltages[i][0]) for i in members])
+        for i, start, stop in zip(members, bounds[:-1], bounds[1:]):
+            results[i] = {
+                "file": files[i],
+                **{key: value[start:stop] for key, value in result.items()},
+            }
+    return results
+
+
+def get_readout_polarity(data_dict: dict) -> np.ndarray:
+    """Polarity of each point that reads back the written bit.
+
+    The counting polarity of ``detect_inverted``, flipped at the points
+    whose stored rate is above 0.5, where the operation inverts the bit.
+    """
+    stored = np.ravel(data_dict["bit_error_rate"])
+    return detect_inverted(data_dict) ^ (stored > 0.5)
+
+
+def load_polarities(
+    file_path: str, files: list[str], readout: bool = False
+) -> list[np.ndarray]:
+    """Per-point polarity of every file, counting or ``get_readout_polarity``."""
+    polarities = []
+    for file in files:
+        data_dict = load_file(os.path.join(file_path, file), POLARITY_KEYS)
+        if readout:
+            polarities.append(get_readout_polarity(data_dict))
+        else:
+            num_points = np.size(data_dict["bit_error_rate"])
+            polarities.append(np.full(num_points, detect_inverted(data_dict)))
+    return polarities
+
+
+def search_directory(file_path: str, invert: Optional[bool] = None) -> list[dict]:
+    """Optimal threshold and BER for every point of every file in one pass.
+
+    The polarity of each file is detected from its stored counts unless
+    ``invert`` is given.
+    """
+    files, voltages = load_read_voltages(file_path)
+    if invert is None:
+        point_invert = load_polarities(file_path, files)
+    else:
+        point_invert = [np.full(len(read_zero), invert) for read_zero, _ in voltages]
+    return apply_stacked(
+        files, voltages, search_optimal_threshold, per_file={"invert": point_invert}
+    )
@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .file_utils import load_file
+
+# Shots aligned and accumulated per batch, bounds the temporary memory
+SHOT_CHUNK = 256
+
+
+def get_shot_traces(data_dict: dict, trace_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Time and voltage of every captured shot of a trace.
+
+    Uses the units of ``get_voltage_trace_data``, µs and mV.
+
+    Returns
+    -------
+    x : np.ndarray
+        Time of each sample, shape (num_samples,).
+    y : np.ndarray
+        Voltages, shape (num_shots, num_samples). A trace stored as a single
+        capture has one shot.
+    """
+    trace = data_dict[trace_name]
+    if trace.ndim == 2:
+        return trace[0] * 1e6, trace[1][None] * 1e3
+    return trace[0][:, 0] * 1e6, trace[1].T * 1e3
+
+
+def cross_correlation_shifts(
+    reference: np.ndarray, traces: np.ndarray, max_shift: Optional[int] = None
+) -> np.ndarray:
+    """Delay of each trace relative to the reference, in samples.
+
+    The cross-correlation of all traces is computed at once through the
+    FFT, zero padded so it is not circular. The peak is refined below one
+    sample with a parabola through its neighbours.
+
+    Parameters
+    ----------
+    reference : np.ndarray
+        Shape (num_samples,).
+    traces : np.ndarray
+        Shape (num_shots, num_samples).
+    max_shift : int, optional
+        Largest delay searched in either direction.
+    """
+    traces = np.atleast_2d(traces)
+    num_samples = traces.shape[-1]
+    size = 2 * num_samples
+    reference = np.nan_to_num(reference - np.nanmean(reference))
+    traces = np.nan_to_num(traces - np.nanmean(traces, axis=-1, keepdims=True))
+    spectrum = np.fft.rfft(traces, size) * np.conj(np.fft.rfft(reference, size))
+    correlation = np.fft.irfft(spectrum, size)
+
+    # Put negative lags first, lag = index - (num_samples - 1)
+    correlation = np.concatenate(
+        [correlation[:, size - num_samples + 1 :], correlation[:, :num_samples]], axis=-1
+    )
+    lags = np.arange(-num_samples + 1, num_samples)
+    if max_shift is not None:
+        correlation = np.where(np.abs(lags) <= max_shift, correlation, -np.inf)
+    peak = np.argmax(correlation, axis=-1)
+
+    neighbours = np.clip(peak[:, None] + np.array([-1, 0, 1]), 0, len(lags) - 1)
+    left, center, right = np.take_along_axis(correlation, neighbours, axis=-1).T
+    curvature = left - 2 * center + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(
+            np.isfinite(curvature) & (curvature < 0),
+            0.5 * (left - right) / curvature,
+            0.0,
+        )
+    return lags[peak] + np.clip(offset, -0.5, 0.5)
+
+
+def apply_shifts(traces: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """Advance each trace by its shift, interpolating fractional samples.
+
+    Samples shifted in from outside the capture are NaN.
+    """
+    traces = np.atleast_2d(traces)
+    num_samples = traces.shape[-1]
+    position = np.arange(num_samples) + np.asarray(shifts, dtype=float)[:, None]
+    lower = np.floor(position).astype(int)
+    fraction = position - lower
+    inside = (lower >= 0) & (lower < num_samples - 1) | (position == num_samples - 1)
+    lower = np.clip(lower, 0, num_samples - 2)
+    low = np.take_along_axis(traces, lower, axis=-1)
+    high = np.take_along_axis(traces, lower + 1, axis=-1)
+    return np.where(inside, low + fraction * (high - low), np.nan)
+
+
+@dataclass
+class RunningAverage:
+    """Per-sample mean and variance of traces accumulated in chunks.
+
+    Uses the pairwise update of Chan et al., so chunks and partial
+    averages from parallel workers combine exactly. NaN samples are
+    skipped, so each sample keeps its own count.
+    """
+
+    count: np.ndarray = field(default=None)
+    mean: np.ndarray = field(default=None)
+    m2: np.ndarray = field(default=None)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        if self.count is None:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+        total = self.count + count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(total > 0, count / total, 0.0)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta**2 * self.count * weight
+        self.count = total
+
+    def add(self, traces: np.ndarray) -> "RunningAverage":
+        traces = np.atleast_2d(traces)
+        valid = np.isfinite(traces)
+        count = valid.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, np.where(valid, traces, 0).sum(axis=0) / count, 0.0)
+        m2 = np.where(valid, (traces - mean) ** 2, 0).sum(axis=0)
+        self._combine(count, mean, m2)
+        return self
+
+    def merge(self, other: "RunningAverage") -> "RunningAverage":
+        if other.count is not None:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    @property
+    def sem(self) -> np.ndarray:
+        """Standard error of the mean of each sample."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.std / np.sqrt(self.count)
+
+
+def accumulate_aligned(
+    reference: np.ndarray,
+    traces: np.ndarray,
+    max_shift: Optional[int] = None,
+    chunk_size: int = SHOT_CHUNK,
+    average: Optional[RunningAverage] = None,
+) -> RunningAverage:
+    """Align shots to the reference and add them to a running average."""
+    average = average if average is not None else RunningAverage()
+    for start in range(0, len(traces), chunk_size):
+        chunk = np.asarray(traces[start : start + chunk_size], dtype=float)
+        shifts = cross_correlation_shifts(reference, chunk, max_shift)
+        average.add(apply_shifts(chunk, shifts))
+    return average
+
+
+def _average_file(
+    file: str,
+    trace_name: str,
+    reference: np.ndarray,
+    max_shift: Optional[int],
+    chunk_size: int,
+) -> RunningAverage:
+    _, traces = get_shot_traces(load_file(file, [trace_name]), trace_name)
+    return accumulate_aligned(reference, traces, max_shift, chunk_size)
+
+
+def average_files(
+    files: list[str],
+    trace_name: str,
+    reference: Optional[np.ndarray] = None,
+    max_shift: Optional[int] = None,
+    chunk_size: int = SHOT_CHUNK,
+    parallel: bool = True,
+    max_workers: Optional[int] = None,
+) -> Tuple[np.ndarray, RunningAverage]:
+    """Aligned average of the raw captures of a trace over many files.
+
+    Each file is loaded, aligned and reduced to a running average by one
+    worker, so only the captures of the files in flight are in memory.
+
+    Parameters
+    ----------
+    files : list[str]
+        The .mat files to read. Their captures must have the same length.
+    trace_name : str
+        The raw capture, e.g. ``"trace_read1"``.
+    reference : np.ndarray, optional
+        Trace to align to. Defaults to the first shot of the first file.
+    max_shift : int, optional
+        Largest alignment shift in samples.
+
+    Returns
+    -------
+    x : np.ndarray
+        Time from the start of the capture in µs.
+    average : RunningAverage
+        Mean, variance and count of each sample.
+    """
+    x, first = get_shot_traces(load_file(files[0], [trace_name]), trace_name)
+    if reference is None:
+        reference = first[0]
+    args = (trace_name, reference, max_shift, chunk_size)
+    if parallel and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partials = list(executor.map(lambda file: _average_file(file, *args), files))
+    else:
+        partials = [_average_file(file, *args) for file in files]
+
+    average = RunningAverage()
+    for partial in partials:
+        average.merge(partial)
+    return x - x[0], average
@@ -0,0 +1,236 @@
+import csv
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .data_processing import get_voltage_trace_data
+from .file_utils import get_file_names, load_file
+
+# Averaged oscilloscope traces of a measurement file
+TRACE_KEYS = [
+    "trace_write_avg",
+    "trace_ewrite_avg",
+    "trace_read0_avg",
+    "trace_read1_avg",
+    "trace_eread_avg",
+]
+READ_TRACE_KEYS = ["trace_read0_avg", "trace_read1_avg"]
+# Leading part of each trace taken as the baseline, before any pulse
+BASELINE_FRACTION = 0.2
+# Peaks below this many baseline standard deviations are not pulses
+DETECTION_SNR = 10
+PULSE_COLUMNS = [
+    "detected",
+    "baseline",
+    "noise",
+    "amplitude",
+    "peak_time",
+    "rise_time",
+    "fall_time",
+    "width",
+]
+
+
+def stack_traces(
+    traces: list[Tuple[np.ndarray, np.ndarray]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack traces of different lengths, padding the end of each with NaN.
+
+    Returns
+    -------
+    x, y : np.ndarray
+        Shape (num_traces, max_num_samples).
+    """
+    length = max(len(y) for _, y in traces)
+    x = np.full((len(traces), length), np.nan)
+    y = np.full((len(traces), length), np.nan)
+    for i, (xi, yi) in enumerate(traces):
+        x[i, : len(xi)] = xi
+        y[i, : len(yi)] = yi
+    return x, y
+
+
+def _crossing_time(
+    x: np.ndarray, signal: np.ndarray, level: np.ndarray, peak: np.ndarray, rising: bool
+) -> np.ndarray:
+    """Time each signal crosses ``level`` on the rising or falling edge of its peak.
+
+    The crossing is interpolated linearly between the last sample below the
+    level before the peak, or the first one below it after the peak, and its
+    neighbour towards the peak. NaN where the edge never reaches the level.
+    """
+    index = np.arange(signal.shape[-1])
+    below = signal < level[:, None]
+    if rising:
+        candidates = below & (index < peak[:, None])
+        # Last candidate, counted from the end of each row
+        last = signal.shape[-1] - 1 - np.argmax(candidates[:, ::-1], axis=-1)
+        outer, inner = last, last + 1
+    else:
+        candidates = below & (index > peak[:, None])
+        first = np.argmax(candidates, axis=-1)
+        outer, inner = first, first - 1
+    found = candidates.any(axis=-1)
+    outer = np.where(found, outer, 0)
+    inner = np.clip(np.where(found, inner, 0), 0, signal.shape[-1] - 1)
+
+    def take(array, i):
+        return np.take_along_axis(array, i[:, None], axis=-1)[:, 0]
+
+    s0, s1 = take(signal, outer), take(signal, inner)
+    t0, t1 = take(x, outer), take(x, inner)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        time = t0 + (level - s0) * (t1 - t0) / (s1 - s0)
+    return np.where(found, time, np.nan)
+
+
+def pulse_parameters(
+    x: np.ndarray, y: np.ndarray, baseline_fraction: float = BASELINE_FRACTION
+) -> dict:
+    """Parameters of the main positive pulse of many traces at once.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Time and voltage of each trace, shape (num_traces, num_samples),
+        NaN padded as from ``stack_traces``.
+    baseline_fraction : float
+        Leading fraction of each trace used for the baseline and noise.
+
+    Returns
+    -------
+    parameters : dict
+        For each trace the ``baseline`` (median) and ``noise`` (standard
+        deviation) before the pulse, the ``amplitude`` and ``peak_time`` of
+        the pulse above the baseline, the 10-90% ``rise_time`` and
+        ``fall_time`` and the full ``width`` at half maximum. Units follow
+        the traces. Traces whose peak is below ``DETECTION_SNR`` times the
+        noise are not ``detected`` and get NaN times.
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    num_samples = np.count_nonzero(np.isfinite(y), axis=-1)
+    index = np.arange(y.shape[-1])
+    leading = index < np.maximum(num_samples * baseline_fraction, 1)[:, None]
+    baseline_samples = np.where(leading, y, np.nan)
+    baseline = np.nanmedian(baseline_samples, axis=-1)
+    noise = np.nanstd(baseline_samples, axis=-1)
+
+    signal = y - baseline[:, None]
+    peak = np.nanargmax(signal, axis=-1)
+    amplitude = np.take_along_axis(signal, peak[:, None], axis=-1)[:, 0]
+    peak_time = np.take_along_axis(x, peak[:, None], axis=-1)[:, 0]
+    # Padding never counts as below a crossing level
+    signal = np.where(np.isfinite(signal), signal, np.inf)
+
+    times = {
+        (fraction, rising): _crossing_time(x, signal, fraction * amplitude, peak, rising)
+        for fraction in (0.1, 0.5, 0.9)
+        for rising in (True, False)
+    }
+    detected = amplitude > DETECTION_SNR * noise
+    times = {key: np.where(detected, time, np.nan) for key, time in times.items()}
+    return {
+        "detected": detected,
+        "baseline": baseline,
+        "noise": noise,
+        "amplitude": amplitude,
+        "peak_time": peak_time,
+        "rise_time": times[0.9, True] - times[0.1, True],
+        "fall_time": times[0.1, False] - times[0.9, False],
+        "width": times[0.5, False] - times[0.5, True],
+    }
+
+
+def read_separation(read_zero: np.ndarray, read_one: np.ndarray, x: np.ndarray) -> dict:
+    """Largest read 1 minus read 0 voltage of traces on a common time base.
+
+    Returns
+    -------
+    separation : dict
+        ``read_separation`` and ``separation_time`` for each pair of traces.
+    """
+    difference = np.atleast_2d(read_one) - np.atleast_2d(read_zero)
+    difference = np.where(np.isfinite(difference), difference, -np.inf)
+    best = np.argmax(difference, axis=-1)[:, None]
+    return {
+        "read_separation": np.take_along_axis(difference, best, axis=-1)[:, 0],
+        "separation_time": np.take_along_axis(np.atleast_2d(x), best, axis=-1)[:, 0],
+    }
+
+
+def load_traces(files: list[str], keys: list[str] = TRACE_KEYS) -> list[tuple]:
+    """(file, key, x, y) of every trace in the files that contain it."""
+    traces = []
+    for file in files:
+        data_dict = load_file(file, keys)
+        for key in keys:
+            if key in data_dict:
+                x, y = get_voltage_trace_data(data_dict, key)
+                traces.append((file, key, x - x[0], y))
+    return traces
+
+
+def get_pulse_table(
+    files: list[str],
+    keys: list[str] = TRACE_KEYS,
+    baseline_fraction: float = BASELINE_FRACTION,
+) -> dict:
+    """Pulse parameters of every averaged trace of many files in one call.
+
+    Times are in µs from the start of each trace and voltages in mV.
+
+    Returns
+    -------
+    table : dict
+        Columns ``file``, ``trace`` and those of ``pulse_parameters``, one
+        row per trace found.
+    """
+    traces = load_traces(files, keys)
+    if not traces:
+        return {"file": [], "trace": [], **{name: np.array([]) for name in PULSE_COLUMNS}}
+    x, y = stack_traces([(x, y) for _, _, x, y in traces])
+    return {
+        "file": [os.path.basename(file) for file, _, _, _ in traces],
+        "trace": [key for _, key, _, _ in traces],
+        **pulse_parameters(x, y, baseline_fraction),
+    }
+
+
+def get_separation_table(files: list[str]) -> dict:
+    """Read 1 to read 0 separation of the files with both averaged read traces."""
+    pairs = {}
+    for file, key, x, y in load_traces(files, READ_TRACE_KEYS):
+        pairs.setdefault(file, {})[key] = (x, y)
+    pairs = {
+        file: traces
+        for file, traces in pairs.items()
+        if len(traces) == 2
+        and len(traces["trace_read0_avg"][1]) == len(traces["trace_read1_avg"][1])
+    }
+    if not pairs:
+        return {"file": [], "read_separation": np.array([]), "separation_time": np.array([])}
+    x, read_zero = stack_traces([traces["trace_read0_avg"] for traces in pairs.values()])
+    _, read_one = stack_traces([traces["trace_read1_avg"] for traces in pairs.values()])
+    return {
+        "file": [os.path.basename(file) for file in pairs],
+        **read_separation(read_zero, read_one, x),
+    }
+
+
+def pulse_table_directory(
+    file_path: str, keys: Optional[list[str]] = None
+) -> Tuple[dict, dict]:
+    """Pulse and read separation tables of every file of a directory."""
+    files = [os.path.join(file_path, file) for file in sorted(get_file_names(file_path))]
+    return get_pulse_table(files, keys or TRACE_KEYS), get_separation_table(files)
+
+
+def save_table(table: dict, file_path: str) -> None:
+    """Write a table of equal-length columns to a CSV file."""
+    columns = list(table)
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(table[column] for column in columns)))
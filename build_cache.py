@@ -0,0 +1,145 @@
+import ast
+import hashlib
+import importlib
+import json
+import os
+import shutil
+from typing import Optional
+
+from analysis.file_utils import resolve_data_path
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ROOT, ".figure_cache")
+
+
+def hash_file(path: str, chunk_size: int = 2**20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_module_path(module_name: str) -> Optional[str]:
+    """Source file of a module in this repository, or None if external."""
+    base = os.path.join(ROOT, *module_name.split("."))
+    for path in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def get_imported_modules(path: str, module_name: str) -> set[str]:
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    package = module_name.rsplit(".", 1)[0] if "." in module_name else ""
+    if path.endswith("__init__.py"):
+        package = module_name
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parent = package.split(".")[: len(package.split(".")) - node.level + 1]
+                base = ".".join(part for part in parent if part)
+                module = f"{base}.{node.module}" if node.module else base
+            else:
+                module = node.module
+            names.add(module)
+            names.update(f"{module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def get_local_dependencies(module_name: str) -> list[str]:
+    """Source files of a module and every repository module it imports."""
+    seen = {}
+    stack = [module_name]
+    while stack:
+        name = stack.pop()
+        path = get_module_path(name)
+        if path is None or name in seen:
+            continue
+        seen[name] = path
+        stack.extend(get_imported_modules(path, name))
+        if "." in name:
+            stack.append(name.rsplit(".", 1)[0])
+    return sorted(set(seen.values()))
+
+
+def get_data_files(module_name: str) -> list[str]:
+    """Every data file in the directories a figure declares as inputs.
+
+    Whole directories are hashed, rather than the selected files only,
+    because the figures select files by their index in the sorted listing.
+    Relative paths are taken from the repository root. A declared directory
+    that does not exist raises FileNotFoundError, so the figure is never
+    treated as up to date without its data.
+    """
+    module = importlib.import_module(module_name)
+    directories = [spec["path"] for spec in getattr(module, "DATA_INPUTS", {}).values()]
+    directories += getattr(module, "DATA_DIRECTORIES", [])
+
+    files = []
+    for directory in directories:
+        directory = resolve_data_path(directory)
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"{module_name} data directory not found: {directory}")
+        files += [
+            os.path.join(directory, file)
+            for file in sorted(os.listdir(directory))
+            if file != "data.txt"
+        ]
+    return files
+
+
+def get_build_key(module_name: str, render_config: dict) -> str:
+    """Content hash of a figure's code, data and render settings."""
+    digest = hashlib.sha256()
+    settings = {
+        key: render_config[key] for key in ("formats", "dpi", "figure_dpi")
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    for path in get_local_dependencies(module_name) + get_data_files(module_name):
+        digest.update(os.path.relpath(path, ROOT).encode())
+        digest.update(hash_file(path).encode())
+    return digest.hexdigest()
+
+
+def get_cache_path(module_name: str, key: str) -> str:
+    return os.path.join(CACHE_DIR, module_name, key)
+
+
+def restore_outputs(module_name: str, key: str, output_dir: str) -> Optional[list[str]]:
+    """Copy cached outputs to the output directory, or None on a miss."""
+    cache_path = get_cache_path(module_name, key)
+    manifest_path = os.path.join(cache_path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        outputs = json.load(f)["outputs"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for output in outputs:
+        path = os.path.join(output_dir, output)
+        shutil.copy2(os.path.join(cache_path, output), path)
+        paths.append(path)
+    return paths
+
+
+def store_outputs(module_name: str, key: str, outputs: list[str]) -> None:
+    """Replace the cached outputs of a figure with a fresh render."""
+    module_cache = os.path.join(CACHE_DIR, module_name)
+    if os.path.isdir(module_cache):
+        shutil.rmtree(module_cache)
+    cache_path = get_cache_path(module_name, key)
+    os.makedirs(cache_path)
+
+    names = []
+    for output in outputs:
+        shutil.copy2(output, cache_path)
+        names.append(os.path.basename(output))
+    with open(os.path.join(cache_path, "manifest.json"), "w") as f:
+        json.dump({"figure": module_name, "outputs": names}, f, indent=2)
@@ -1,27 +1,45 @@
 import matplotlib.pyplot as plt
 
-from analysis.file_utils import import_directory
+from analysis.file_utils import load_data_inputs
+from plotting.render import finalize_figure
 from plotting.style import apply_snm_style, set_figsize_square
 from plotting.transients import plot_voltage_hist, plot_voltage_trace_averaged
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "histogram": {
+        "path": "data/figure1",
+        "keys": ["read_zero_top", "read_one_top"],
+        "select": [1],
+    },
+    "waveforms": {
+        "path": "data/figure1",
+        "keys": [
+            "trace_write_avg",
+            "trace_ewrite_avg",
+            "trace_read0_avg",
+            "trace_read1_avg",
+            "trace_eread_avg",
+        ],
+        "select": [4],
+    },
+}
 
-def plot_histogram():
+
+def plot_histogram(data_dict: dict):
     """
-    Plot a histogram of voltage data from the specified directory.
+    Plot a histogram of the read voltages of one measurement.
     """
     fig, ax = plt.subplots(figsize=set_figsize_square())
-    data = import_directory("data/figure1")
-    plot_voltage_hist(ax, data[1])
-    plt.show()
+    plot_voltage_hist(ax, data_dict)
+    finalize_figure(fig, "figure1_histogram")
 
 
-def plot_waveforms():
+def plot_waveforms(data_dict: dict):
     """
     Plot averaged voltage waveforms with twin axes for enable traces.
     """
-    data = import_directory("data/figure1")
     fig, ax_dict = plt.subplot_mosaic(
         [["A"], ["B"]],
         figsize=set_figsize_square(),
@@ -33,19 +51,19 @@ def plot_waveforms():
 
     # Plot waveforms
     plot_voltage_trace_averaged(
-        ax_dict["A"], data[4], "trace_write_avg", color="#293689", label="Write"
+        ax_dict["A"], data_dict, "trace_write_avg", color="#293689", label="Write"
     )
     plot_voltage_trace_averaged(
-        ax_enable_write, data[4], "trace_ewrite_avg", color="#ff1423", label="Enable Write"
+        ax_enable_write, data_dict, "trace_ewrite_avg", color="#ff1423", label="Enable Write"
     )
     plot_voltage_trace_averaged(
-        ax_dict["B"], data[4], "trace_read0_avg", color="#1966ff", label="Read 0"
+        ax_dict["B"], data_dict, "trace_read0_avg", color="#1966ff", label="Read 0"
     )
     plot_voltage_trace_averaged(
-        ax_dict["B"], data[4], "trace_read1_avg", color="#ff7f0e", linestyle="--", label="Read 1"
+        ax_dict["B"], data_dict, "trace_read1_avg", color="#ff7f0e", linestyle="--", label="Read 1"
     )
     plot_voltage_trace_averaged(
-        ax_enable_read, data[4], "trace_eread_avg", color="#ff1423", label="Enable Read"
+        ax_enable_read, data_dict, "trace_eread_avg", color="#ff1423", label="Enable Read"
     )
 
     # Set labels
@@ -61,14 +79,15 @@ def plot_waveforms():
     ax_dict["B"].legend(loc="upper left")
     ax_enable_read.legend(loc="upper right")
 
-    plt.show()
+    finalize_figure(fig, "figure1_waveforms")
 
 def main():
     """
     Main function to execute the plotting functions.
     """
-    plot_histogram()
-    plot_waveforms()
+    data = load_data_inputs(DATA_INPUTS)
+    plot_histogram(data["histogram"][0])
+    plot_waveforms(data["waveforms"][0])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
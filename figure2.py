@@ -11,8 +11,9 @@ from analysis.data_processing import (
     get_enable_read_current,
     get_enable_write_current,
 )
-from analysis.file_utils import import_directory
+from analysis.file_utils import SWEEP_KEYS, load_data_inputs
 from plotting.helpers import plot_fill_between_array, set_ber_ticks
+from plotting.render import finalize_figure
 from plotting.style import CMAP
 from plotting.sweeps import plot_read_sweep
 
@@ -20,6 +21,11 @@ READ_XMIN: int = 400
 READ_XMAX: int = 1000
 IC0_C3: int = 910
 
+DATA_INPUTS = {
+    "enable_read": {"path": "data/figure2/data_310uA", "keys": SWEEP_KEYS},
+    "enable_write": {"path": "data/figure2/data_enable_write", "keys": SWEEP_KEYS},
+}
+
 
 def configure_axis(
     ax: Axes,
@@ -84,17 +90,16 @@ def plot_temperature(
 ) -> Axes:
     colors = CMAP(np.linspace(0, 1, len(currents)))
     ax.plot(currents, temperatures, marker="o", color="black", markersize=4)
-
-    for i, (current, temp) in enumerate(zip(currents, temperatures)):
-        ax.plot(
-            current,
-            temp,
-            marker="o",
-            markersize=marker_size,
-            markeredgecolor="black",
-            markerfacecolor=colors[i],
-            markeredgewidth=0.2,
-        )
+    ax.scatter(
+        currents,
+        temperatures,
+        s=marker_size**2,
+        c=colors,
+        marker="o",
+        edgecolors="black",
+        linewidths=0.2,
+        zorder=2,
+    )
     return ax
 
 
@@ -117,15 +122,9 @@ def preprocess_data(
 
 
 def main():
-        # Import data
-    data: List[dict] = import_directory("data")
-    enable_read_290_list: List[dict] = import_directory("data/figure2/data_290uA")
-    enable_read_300_list: List[dict] = import_directory("data/figure2/data_300uA")
-    enable_read_310_list: List[dict] = import_directory("data/figure2/data_310uA")
-    data_inverse: List[dict] = import_directory("data/figure2/data_inverse")
-
-    dict_list: List[dict] = [enable_read_290_list, enable_read_300_list, enable_read_310_list][2]
-    data_list: List[dict] = import_directory("data/figure2/data_enable_write")
+    data = load_data_inputs(DATA_INPUTS)
+    dict_list: List[dict] = data["enable_read"]
+    data_list: List[dict] = data["enable_write"]
     data_list_subset: List[dict] = [data_list[0], data_list[3], data_list[-6], data_list[-1]]
 
     # Preprocess data
@@ -164,7 +163,7 @@ def main():
     plot_temperature(ax, enable_write_currents, write_temperatures)
     configure_axis(ax, "$I_{\mathrm{enable}}$ [$\mu$A]", "$T_{\mathrm{write}}$ [K]")
 
-    plt.show()
+    finalize_figure(fig, "figure2")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,14 @@
 import os
 
-import ltspice
-import numpy as np
 from matplotlib import pyplot as plt
 
 from analysis.data_processing import (
     filter_first,
     process_read_data,
 )
-from analysis.file_utils import import_directory
+from analysis.file_utils import SWEEP_KEYS, load_cached, resolve_data_path
+from plotting.panels import draw_panels, prepare_panels, render_panel
+from plotting.render import finalize_figure
 from plotting.style import CMAP, apply_snm_style
 from plotting.sweeps import (
     plot_current_sweep_ber,
@@ -22,75 +22,48 @@ from plotting.transients import (
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "write_sweep": {
+        "path": "data/figure3/write_current_sweep",
+        "keys": SWEEP_KEYS,
+        "select": slice(None, None, 2),
+    },
+}
+# LTspice results read directly from disk
+LTSPICE_DIRECTORY = "data/figure3/read_current_sweep"
+DATA_DIRECTORIES = [LTSPICE_DIRECTORY]
+EXAMPLE_TRACE = "nmem_cell_read_example_trace.raw"
+CASE = 16
 
-def main():
-    
-    # Get and parse raw files
-    files = [
-        f for f in os.listdir("data/figure3/read_current_sweep/") if f.endswith(".raw")
-    ]
-    parsed_data = {}
-    write_current_list = []
 
-    for file in files:
-        data = ltspice.Ltspice(f"data/figure3/read_current_sweep/{file}").parse()
-        ltsp_data_dict = process_read_data(data)
-        parsed_data[file] = ltsp_data_dict
-        write_current = ltsp_data_dict[0]["write_current"][0] * 1e6
-        write_current_list.append(write_current)
+def parse_ltspice_file(path: str) -> dict:
+    import ltspice
 
-    # Sort files and data by write current
-    sorted_files_data = sorted(zip(files, write_current_list), key=lambda x: x[1])
-    files, write_current_list = zip(*sorted_files_data)
+    return process_read_data(ltspice.Ltspice(path).parse())
 
-    # Parse example trace once
-    ltsp_data_dict = parsed_data["nmem_cell_read_example_trace.raw"]
 
-    inner = [
-        ["T0", "T1", "T2", "T3"],
-    ]
-    innerb = [
-        ["B0", "B1", "B2", "B3"],
-    ]
-    inner2 = [
-        ["A", "B"],
-    ]
-    inner3 = [
-        ["C", "D"],
-    ]
-    outer_nested_mosaic = [
-        [inner],
-        [innerb],
-        [inner2],
-        [inner3],
-    ]
-    fig, axs = plt.subplot_mosaic(
-        outer_nested_mosaic,
-        figsize=(180 / 25.4, 180 / 25.4),
-        height_ratios=[2, 0.5, 1, 1],
+def load_ltspice_file(file: str) -> dict:
+    path = os.path.join(resolve_data_path(LTSPICE_DIRECTORY), file)
+    return load_cached(path, parse_ltspice_file)
+
+
+def load_ltspice_sweeps() -> tuple[list[str], dict]:
+    """Parse every LTspice result, with the files sorted by write current."""
+    directory = resolve_data_path(LTSPICE_DIRECTORY)
+    files = [f for f in os.listdir(directory) if f.endswith(".raw")]
+    parsed_data = {file: load_ltspice_file(file) for file in files}
+    files = sorted(
+        files, key=lambda file: parsed_data[file][0]["write_current"][0] * 1e6
     )
+    return files, parsed_data
 
-    CASE = 16
-    create_plot(axs, ltsp_data_dict, cases=[CASE])
-    case_current = ltsp_data_dict[CASE]["read_current"][CASE]
 
-    handles, labels = axs["T0"].get_legend_handles_labels()
-    # Select specific items
-    selected_labels = [
-        "Left Branch Current",
-        "Right Branch Current",
-        "Left Critical Current",
-        "Right Critical Current",
-    ]
-    selected_labels2 = [
-        "$i_{\mathrm{H_L}}$",
-        "$i_{\mathrm{H_R}}$",
-        "$I_{\mathrm{c,H_L}}$",
-        "$I_{\mathrm{c,H_R}}$",
-    ]
-    selected_handles = [handles[labels.index(lbl)] for lbl in selected_labels]
+def get_case_current() -> float:
+    return load_ltspice_file(EXAMPLE_TRACE)[CASE]["read_current"][CASE]
+
 
-    dict_list = import_directory("data/figure3/write_current_sweep")[::2]
+def prepare_write_sweep(data: dict) -> dict:
+    dict_list = data["write_sweep"]
     write_current_list = [
         filter_first(data_dict["write_current"]) * 1e6 for data_dict in dict_list
     ]
@@ -98,10 +71,29 @@ def main():
     # Sort dict_list and write_current_list together
     sorted_dicts = sorted(zip(dict_list, write_current_list), key=lambda x: x[1])
     dict_list, write_current_list = zip(*sorted_dicts)
+    return {
+        "dict_list": dict_list,
+        "write_current_list": write_current_list,
+        "case_current": get_case_current(),
+    }
+
+
+def prepare_ltspice_sweeps(data: dict) -> dict:
+    files, parsed_data = load_ltspice_sweeps()
+    return {
+        "dict_list": [parsed_data[files[i]] for i in [0, 2, 11]],
+        "case_current": get_case_current(),
+    }
+
+
+def draw_transients(axs: dict, ltsp_data_dict: dict):
+    create_plot(axs, ltsp_data_dict, cases=[CASE])
+
 
+def draw_read_sweep(axs: dict, panel_data: dict):
     plot_read_sweep_array(
         axs["A"],
-        dict_list,
+        panel_data["dict_list"],
         "bit_error_rate",
         "write_current",
         marker=".",
@@ -111,30 +103,42 @@ def main():
     axs["A"].set_xlim(650, 850)
     axs["A"].set_ylabel("BER")
     axs["A"].set_xlabel("$I_{\mathrm{read}}$ [$\mu$A]", labelpad=-1)
+    axs["A"].axvline(
+        panel_data["case_current"], color="black", linestyle="--", linewidth=0.5
+    )
+
+
+def draw_read_switch_probability(axs: dict, panel_data: dict):
     plot_read_switch_probability_array(
-        axs["B"], dict_list, write_current_list, marker=".", linestyle="-", markersize=2
+        axs["B"],
+        panel_data["dict_list"],
+        panel_data["write_current_list"],
+        marker=".",
+        linestyle="-",
+        markersize=2,
     )
     axs["B"].set_xlim(650, 850)
     axs["B"].set_xlabel("$I_{\mathrm{read}}$ [$\mu$A]", labelpad=-1)
-    axs["D"].set_xlabel("$I_{\mathrm{read}}$ [$\mu$A]", labelpad=-1)
+    axs["B"].set_ylabel("Switching Probability")
+    axs["B"].axvline(
+        panel_data["case_current"], color="black", linestyle="--", linewidth=0.5
+    )
+    axs["B"].legend(
+        loc="upper right",
+        labelspacing=0.1,
+        fontsize=6,
+    )
+
 
+def draw_ltspice_ber(axs: dict, panel_data: dict):
     axs["C"].set_xlim(650, 850)
-    axs["D"].set_xlim(650, 850)
     axs["C"].set_xlabel("$I_{\mathrm{read}}$ [$\mu$A]", labelpad=-1)
     axs["C"].set_ylabel("BER")
-    axs["B"].set_ylabel("Switching Probability")
-    axs["D"].set_ylabel("Switching Probability")
 
-    colors = CMAP(np.linspace(0, 1, len(dict_list)))
-    col_set = [colors[i] for i in [0, 2, -1]]
-    selected_files = [files[i] for i in [0, 2, 11]]
     max_write_current = 300
-
-    for file in selected_files:
-        ltsp_data_dict = parsed_data[file]
+    for ltsp_data_dict in panel_data["dict_list"]:
         ltsp_write_current = ltsp_data_dict[0]["write_current"][0]
         normalized_color = CMAP(ltsp_write_current / max_write_current)
-
         plot_current_sweep_ber(
             axs["C"],
             ltsp_data_dict,
@@ -144,6 +148,20 @@ def main():
             linestyle="-",
             markersize=5,
         )
+    axs["C"].axvline(
+        panel_data["case_current"], color="black", linestyle="--", linewidth=0.5
+    )
+
+
+def draw_ltspice_switching(axs: dict, panel_data: dict):
+    axs["D"].set_xlabel("$I_{\mathrm{read}}$ [$\mu$A]", labelpad=-1)
+    axs["D"].set_xlim(650, 850)
+    axs["D"].set_ylabel("Switching Probability")
+
+    max_write_current = 300
+    for ltsp_data_dict in panel_data["dict_list"]:
+        ltsp_write_current = ltsp_data_dict[0]["write_current"][0]
+        normalized_color = CMAP(ltsp_write_current / max_write_current)
         plot_current_sweep_switching(
             axs["D"],
             ltsp_data_dict,
@@ -152,16 +170,8 @@ def main():
             marker=".",
             markersize=5,
         )
-
-    axs["A"].axvline(case_current, color="black", linestyle="--", linewidth=0.5)
-    axs["B"].axvline(case_current, color="black", linestyle="--", linewidth=0.5)
-    axs["C"].axvline(case_current, color="black", linestyle="--", linewidth=0.5)
-    axs["D"].axvline(case_current, color="black", linestyle="--", linewidth=0.5)
-
-    axs["B"].legend(
-        loc="upper right",
-        labelspacing=0.1,
-        fontsize=6,
+    axs["D"].axvline(
+        panel_data["case_current"], color="black", linestyle="--", linewidth=0.5
     )
     axs["D"].legend(
         loc="upper right",
@@ -169,6 +179,81 @@ def main():
         fontsize=6,
     )
 
+
+PANELS = {
+    "transient": {
+        "inputs": [],
+        "prepare": lambda data: load_ltspice_file(EXAMPLE_TRACE),
+        "draw": draw_transients,
+        "layout": [["T0", "T1", "T2", "T3"], ["B0", "B1", "B2", "B3"]],
+    },
+    "A": {
+        "inputs": ["write_sweep"],
+        "prepare": prepare_write_sweep,
+        "draw": draw_read_sweep,
+    },
+    "B": {
+        "inputs": ["write_sweep"],
+        "prepare": prepare_write_sweep,
+        "draw": draw_read_switch_probability,
+    },
+    "C": {"inputs": [], "prepare": prepare_ltspice_sweeps, "draw": draw_ltspice_ber},
+    "D": {
+        "inputs": [],
+        "prepare": prepare_ltspice_sweeps,
+        "draw": draw_ltspice_switching,
+    },
+}
+
+
+def main(panel: str = None):
+    if panel is not None:
+        render_panel("figure3", PANELS, DATA_INPUTS, panel)
+        return
+
+    inner = [
+        ["T0", "T1", "T2", "T3"],
+    ]
+    innerb = [
+        ["B0", "B1", "B2", "B3"],
+    ]
+    inner2 = [
+        ["A", "B"],
+    ]
+    inner3 = [
+        ["C", "D"],
+    ]
+    outer_nested_mosaic = [
+        [inner],
+        [innerb],
+        [inner2],
+        [inner3],
+    ]
+    fig, axs = plt.subplot_mosaic(
+        outer_nested_mosaic,
+        figsize=(180 / 25.4, 180 / 25.4),
+        height_ratios=[2, 0.5, 1, 1],
+    )
+
+    panel_data = prepare_panels("figure3", PANELS, DATA_INPUTS)
+    draw_panels(axs, PANELS, panel_data)
+
+    handles, labels = axs["T0"].get_legend_handles_labels()
+    # Select specific items
+    selected_labels = [
+        "Left Branch Current",
+        "Right Branch Current",
+        "Left Critical Current",
+        "Right Critical Current",
+    ]
+    selected_labels2 = [
+        "$i_{\mathrm{H_L}}$",
+        "$i_{\mathrm{H_R}}$",
+        "$I_{\mathrm{c,H_L}}$",
+        "$I_{\mathrm{c,H_R}}$",
+    ]
+    selected_handles = [handles[labels.index(lbl)] for lbl in selected_labels]
+
     fig.subplots_adjust(hspace=0.5, wspace=0.5)
     fig.patch.set_alpha(0)
 
@@ -185,8 +270,8 @@ def main():
         fontsize=8,
     )
 
-    plt.show()
+    finalize_figure(fig, "figure3")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,8 @@
-import os
-
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import ticker
 
+from analysis.confidence import get_errorbar, wilson_interval
 from analysis.data_processing import (
     get_bit_error_rate,
     get_bit_error_rate_args,
@@ -16,10 +15,13 @@ from analysis.data_processing import (
     get_read_currents,
     get_write_current,
 )
-from analysis.file_utils import import_directory
+from analysis.file_utils import SWEEP_KEYS
+from analysis.retention import analyze_retention, predict_decay
 from plotting.arrays import (
     plot_ber_grid,
 )
+from plotting.panels import draw_panels, prepare_panels, render_panel
+from plotting.render import finalize_figure
 from plotting.style import CMAP, CMAP2, apply_snm_style
 from plotting.sweeps import (
     plot_enable_write_sweep_multiple,
@@ -28,6 +30,19 @@ from plotting.sweeps import (
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "enable_write_sweep": {"path": "data/figure4/data", "keys": SWEEP_KEYS},
+    "write_sweep": {
+        "path": "data/figure4/data2",
+        "keys": SWEEP_KEYS,
+        "select": slice(1, None),
+    },
+    "delay": {
+        "path": "data/figure4/data3",
+        "keys": ["delay", "bit_error_rate", "num_meas"],
+    },
+}
+
 
 def plot_enable_sweep(
     ax: plt.Axes,
@@ -143,23 +158,34 @@ def plot_write_sweep_formatted_markers(ax: plt.Axes, data_dict: dict):
     return ax
 
 
-def plot_delay(ax: plt.Axes, data_dict: dict):
-    delay_list = data_dict.get("delay")
-    bit_error_rate = data_dict.get("bit_error_rate")
-    N = 200e3
-    sort_index = np.argsort(delay_list)
-    delay_list = np.array(delay_list)[sort_index]
-    bit_error_rate = np.array(bit_error_rate)[sort_index]
-    bit_error_rate = np.array(bit_error_rate).flatten()
-    ber_std = np.sqrt(bit_error_rate * (1 - bit_error_rate) / N)
-    ax.errorbar(
-        delay_list,
-        bit_error_rate,
-        yerr=ber_std,
-        fmt="-",
-        marker=".",
-        color="black",
-    )
+def plot_delay(ax: plt.Axes, data_dict: dict, show_fit: bool = False):
+    delay_list = data_dict["delay"]
+    num_shots = data_dict["num_shots"]
+    for bit_error_rate in data_dict["bit_error_rate"].T:
+        lower, upper = wilson_interval(bit_error_rate, num_shots)
+        ax.errorbar(
+            delay_list,
+            bit_error_rate,
+            yerr=get_errorbar(bit_error_rate, lower, upper),
+            fmt="-",
+            marker=".",
+            color="black",
+        )
+    # The fit is drawn on the log axis, over the positive delays only
+    positive = delay_list[delay_list > 0]
+    if show_fit and len(positive) > 1:
+        delays = np.logspace(*np.log10(positive[[0, -1]]), 100)
+        prediction = predict_decay(data_dict["fit"], delays)
+        for i in range(prediction["bit_error_rate"].shape[1]):
+            ax.plot(delays, prediction["bit_error_rate"][:, i], color="C0")
+            ax.fill_between(
+                delays,
+                prediction["lower"][:, i],
+                prediction["upper"][:, i],
+                color="C0",
+                alpha=0.2,
+                linewidth=0,
+            )
     ax.set_ylabel("BER")
     ax.set_xlabel("Memory Retention Time (s)")
 
@@ -173,10 +199,7 @@ def plot_delay(ax: plt.Axes, data_dict: dict):
 
 
 
-def import_write_sweep_formatted() -> list[dict]:
-    dict_list = import_directory("data/figure4/data2")
-
-    dict_list = dict_list[1:]
+def import_write_sweep_formatted(dict_list: list[dict]) -> list[dict]:
     dict_list = dict_list[::-1]
     dict_list = sorted(
         dict_list, key=lambda x: x.get("enable_write_current").flatten()[0]
@@ -184,23 +207,8 @@ def import_write_sweep_formatted() -> list[dict]:
     return dict_list
 
 
-def import_delay_dict() -> dict:
-    dict_list = import_directory(
-        os.path.join(os.path.dirname(__file__), "data/figure4/data3")
-    )
-    delay_list = []
-    bit_error_rate_list = []
-    for data_dict in dict_list:
-        delay = data_dict.get("delay").flatten()[0] * 1e-3
-        bit_error_rate = get_bit_error_rate(data_dict)
-
-        delay_list.append(delay)
-        bit_error_rate_list.append(bit_error_rate)
-
-    delay_dict = {}
-    delay_dict["delay"] = delay_list
-    delay_dict["bit_error_rate"] = bit_error_rate_list
-    return delay_dict
+def import_delay_dict(dict_list: list[dict]) -> dict:
+    return analyze_retention(dict_list)
 
 
 def import_write_sweep_formatted_markers(dict_list) -> list[dict]:
@@ -245,7 +253,74 @@ def import_write_sweep_formatted_markers(dict_list) -> list[dict]:
 
 
 
-def main():
+def prepare_enable_write_sweep(data: dict) -> list[dict]:
+    return sorted(
+        data["enable_write_sweep"],
+        key=lambda x: x.get("write_current").flatten()[0],
+    )
+
+
+def draw_enable_sweep(axs: dict, dict_list: list[dict]):
+    plot_enable_sweep(axs["A"], dict_list, range=slice(0, len(dict_list), 2))
+
+
+def draw_enable_sweep_markers(axs: dict, dict_list: list[dict]):
+    plot_enable_sweep_markers(axs["B"], dict_list)
+
+
+def draw_write_sweep(axs: dict, dict_list: list[dict]):
+    plot_write_sweep_formatted(axs["C"], dict_list)
+
+
+def draw_write_sweep_markers(axs: dict, data_dict: dict):
+    plot_write_sweep_formatted_markers(axs["D"], data_dict)
+
+
+def draw_delay(axs: dict, delay_dict: dict):
+    plot_delay(axs["delay"], delay_dict)
+
+
+def draw_ber_grid(axs: dict, data: dict):
+    plot_ber_grid(axs["bergrid"])
+
+
+PANELS = {
+    "A": {
+        "inputs": ["enable_write_sweep"],
+        "prepare": prepare_enable_write_sweep,
+        "draw": draw_enable_sweep,
+    },
+    "B": {
+        "inputs": ["enable_write_sweep"],
+        "prepare": prepare_enable_write_sweep,
+        "draw": draw_enable_sweep_markers,
+    },
+    "C": {
+        "inputs": ["write_sweep"],
+        "prepare": lambda data: import_write_sweep_formatted(data["write_sweep"]),
+        "draw": draw_write_sweep,
+    },
+    "D": {
+        "inputs": ["write_sweep"],
+        "prepare": lambda data: import_write_sweep_formatted_markers(
+            import_write_sweep_formatted(data["write_sweep"])
+        ),
+        "draw": draw_write_sweep_markers,
+    },
+    "delay": {
+        "inputs": ["delay"],
+        "prepare": lambda data: import_delay_dict(data["delay"]),
+        "draw": draw_delay,
+    },
+    "bergrid": {"inputs": [], "draw": draw_ber_grid},
+}
+
+
+def main(panel: str = None):
+    if panel is not None:
+        render_panel("figure4", PANELS, DATA_INPUTS, panel)
+        return
+
     inner = [
         ["A", "C"],
     ]
@@ -266,28 +341,8 @@ def main():
         figsize=(180 / 25.4, 180 / 25.4),
     )
 
-    dict_list = import_directory("data/figure4/data")
-    sort_dict_list = sorted(
-        dict_list, key=lambda x: x.get("write_current").flatten()[0]
-    )
-
-    ax = axs["A"]
-    plot_enable_sweep(ax, sort_dict_list, range=slice(0, len(sort_dict_list), 2))
-
-    ax = axs["B"]
-    plot_enable_sweep_markers(ax, sort_dict_list)
-
-    dict_list = import_write_sweep_formatted()
-    plot_write_sweep_formatted(axs["C"], dict_list)
-
-    data_dict = import_write_sweep_formatted_markers(dict_list)
-    plot_write_sweep_formatted_markers(axs["D"], data_dict)
-
-    delay_dict = import_delay_dict()
-
-    plot_delay(axs["delay"], delay_dict)
-
-    plot_ber_grid(axs["bergrid"])
+    panel_data = prepare_panels("figure4", PANELS, DATA_INPUTS)
+    draw_panels(axs, PANELS, panel_data)
     fig.subplots_adjust(wspace=0.4, hspace=0.5)
 
     axpos = axs["A"].get_position()
@@ -300,7 +355,7 @@ def main():
     axs["delay"].set_position([delay_pos.x0, delay_pos.y0, ax3pos.width, ax3pos.height])
     bergrid_pos = axs["bergrid"].get_position()
 
-    plt.show()
+    finalize_figure(fig, "figure4")
 
 
 
@@ -12,27 +12,13 @@ from analysis.cell_utils import (
     process_cell,
 )
 from analysis.constants import CELLS
-from analysis.data_processing import (
-    filter_first,
-    get_total_switches_norm,
-)
+from analysis.data_processing import get_sweep_array
 
 
 def build_array(
     data_dict: dict, parameter_z: Literal["total_switches_norm"]
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    if data_dict.get("total_switches_norm") is None:
-        data_dict["total_switches_norm"] = get_total_switches_norm(data_dict)
-    x: np.ndarray = data_dict.get("x")[0][:, 0] * 1e6
-    y: np.ndarray = data_dict.get("y")[0][:, 0] * 1e6
-    z: np.ndarray = data_dict.get(parameter_z)
-
-    xlength: int = filter_first(data_dict.get("sweep_x_len", len(x)))
-    ylength: int = filter_first(data_dict.get("sweep_y_len", len(y)))
-
-    # X, Y reversed in reshape
-    zarray = z.reshape((ylength, xlength), order="F")
-    return x, y, zarray
+    return get_sweep_array(data_dict, parameter_z)
 
 
 def plot_parameter_array(
@@ -16,24 +16,39 @@ from analysis.data_processing import (
 from plotting.style import CMAP
 
 
-def plot_fill_between(ax: Axes, data_dict: Dict, fill_color: str) -> Axes:
-    # fill the area between 0.5 and the curve
+def get_fill_between_polygons(data_dict: Dict) -> list:
     enable_write_currents = get_enable_current_sweep(data_dict)
     bit_error_rate = get_bit_error_rate(data_dict)
-    verts = polygon_nominal(enable_write_currents, bit_error_rate)
-    poly = PolyCollection([verts], facecolors=fill_color, alpha=0.3, edgecolors="k")
-    ax.add_collection(poly)
-    verts = polygon_inverting(enable_write_currents, bit_error_rate)
-    poly = PolyCollection([verts], facecolors=fill_color, alpha=0.3, edgecolors="k")
+    return [
+        polygon_nominal(enable_write_currents, bit_error_rate),
+        polygon_inverting(enable_write_currents, bit_error_rate),
+    ]
+
+
+def plot_fill_between(ax: Axes, data_dict: Dict, fill_color: str) -> Axes:
+    # fill the area between 0.5 and the curve
+    poly = PolyCollection(
+        get_fill_between_polygons(data_dict),
+        facecolors=fill_color,
+        alpha=0.3,
+        edgecolors="k",
+    )
     ax.add_collection(poly)
 
     return ax
 
 
 def plot_fill_between_array(ax: Axes, dict_list: list[dict]) -> Axes:
+    # One collection for the whole family instead of one per polygon
     colors = CMAP(np.linspace(0.1, 1, len(dict_list)))
-    for i, data_dict in enumerate(dict_list):
-        plot_fill_between(ax, data_dict, colors[i])
+    verts = []
+    facecolors = []
+    for color, data_dict in zip(colors, dict_list):
+        polygons = get_fill_between_polygons(data_dict)
+        verts.extend(polygons)
+        facecolors.extend([color] * len(polygons))
+    poly = PolyCollection(verts, facecolors=facecolors, alpha=0.3, edgecolors="k")
+    ax.add_collection(poly)
     return ax
 
 
@@ -0,0 +1,75 @@
+from typing import Optional
+
+import matplotlib.pyplot as plt
+
+from analysis.file_utils import load_data_inputs
+from plotting.render import finalize_figure
+
+# Prepared panel data keyed by (figure name, panel name)
+PANEL_CACHE = {}
+
+
+def get_panel_inputs(data_inputs: dict, panels: dict, names: list[str]) -> dict:
+    """The subset of a figure's declared inputs used by some of its panels."""
+    input_names = {name for panel in names for name in panels[panel]["inputs"]}
+    return {name: spec for name, spec in data_inputs.items() if name in input_names}
+
+
+def prepare_panels(
+    figure_name: str,
+    panels: dict,
+    data_inputs: dict,
+    names: Optional[list[str]] = None,
+) -> dict:
+    """Prepared data of each panel, loading only the inputs not yet cached."""
+    names = list(panels) if names is None else names
+    missing = [name for name in names if (figure_name, name) not in PANEL_CACHE]
+    if missing:
+        data = load_data_inputs(get_panel_inputs(data_inputs, panels, missing))
+        for name in missing:
+            prepare = panels[name].get("prepare")
+            inputs = {key: data[key] for key in panels[name]["inputs"]}
+            PANEL_CACHE[(figure_name, name)] = (
+                prepare(inputs) if prepare is not None else inputs
+            )
+    return {name: PANEL_CACHE[(figure_name, name)] for name in names}
+
+
+def draw_panels(
+    axs: dict, panels: dict, panel_data: dict, names: Optional[list[str]] = None
+) -> dict:
+    names = list(panel_data) if names is None else names
+    for name in names:
+        panels[name]["draw"](axs, panel_data[name])
+    return axs
+
+
+def get_panel_layout(panels: dict, name: str) -> list:
+    return panels[name].get("layout", [[name]])
+
+
+def render_panel(
+    figure_name: str,
+    panels: dict,
+    data_inputs: dict,
+    name: str,
+    figsize: tuple = None,
+) -> plt.Figure:
+    """Render one panel of a figure in its own figure.
+
+    Only the inputs of that panel are loaded, and its prepared data is kept
+    in ``PANEL_CACHE`` for later renders of the same panel or the full figure.
+    """
+    panel_data = prepare_panels(figure_name, panels, data_inputs, [name])
+    fig, axs = plt.subplot_mosaic(
+        get_panel_layout(panels, name), figsize=figsize, constrained_layout=True
+    )
+    draw_panels(axs, panels, panel_data)
+    finalize_figure(fig, f"{figure_name}_{name}")
+    return fig
+
+
+def clear_panel_cache(figure_name: Optional[str] = None) -> None:
+    for key in list(PANEL_CACHE):
+        if figure_name is None or key[0] == figure_name:
+            del PANEL_CACHE[key]
@@ -0,0 +1,91 @@
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+RENDER_FORMATS = ["png", "pdf", "svg"]
+VECTOR_FORMATS = ["pdf", "svg"]
+
+RENDER_CONFIG = {
+    "headless": False,
+    "output_dir": "figures",
+    "formats": ["png"],
+    "dpi": 300,
+    "figure_dpi": {},
+    "saved": [],
+}
+
+
+def configure_headless(
+    output_dir: str = "figures",
+    formats: Optional[list[str]] = None,
+    dpi: int = 300,
+    figure_dpi: Optional[dict] = None,
+) -> dict:
+    """Switch to the non-interactive Agg backend and save figures to disk.
+
+    Parameters
+    ----------
+    output_dir : str
+        Directory the figures are written to.
+    formats : list[str], optional
+        Any of ``RENDER_FORMATS``. Defaults to PNG only.
+    dpi : int
+        Default resolution of the saved figures.
+    figure_dpi : dict, optional
+        Resolution overrides keyed by figure name.
+    """
+    formats = formats or ["png"]
+    invalid = [fmt for fmt in formats if fmt not in RENDER_FORMATS]
+    if invalid:
+        raise ValueError(f"Invalid formats: {invalid}")
+
+    import matplotlib as mpl
+
+    mpl.use("Agg", force=True)
+    RENDER_CONFIG.update(
+        {
+            "headless": True,
+            "output_dir": output_dir,
+            "formats": list(formats),
+            "dpi": dpi,
+            "figure_dpi": dict(figure_dpi or {}),
+        }
+    )
+    return RENDER_CONFIG
+
+
+def get_figure_dpi(name: str) -> int:
+    return RENDER_CONFIG["figure_dpi"].get(name, RENDER_CONFIG["dpi"])
+
+
+def save_figure(fig: "plt.Figure", name: str) -> list[str]:
+    from plotting.style import RASTERIZE_POLICY, apply_rasterization_policy
+
+    output_dir = RENDER_CONFIG["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in RENDER_CONFIG["formats"]:
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        if fmt in VECTOR_FORMATS:
+            # Dense artists are embedded as images at the policy resolution
+            apply_rasterization_policy(fig)
+            fig.savefig(path, dpi=RASTERIZE_POLICY["dpi"])
+        else:
+            fig.savefig(path, dpi=get_figure_dpi(name))
+        paths.append(path)
+    RENDER_CONFIG["saved"].extend(paths)
+    return paths
+
+
+def finalize_figure(fig: "plt.Figure", name: str) -> list[str]:
+    """Show the figure, or save and close it when running headless."""
+    import matplotlib.pyplot as plt
+
+    if not RENDER_CONFIG["headless"]:
+        plt.show()
+        return []
+    paths = save_figure(fig, name)
+    plt.close(fig)
+    return paths
@@ -2,14 +2,17 @@ import os
 from typing import Literal
 
 import matplotlib as mpl
+import matplotlib.collections as mcollections
 import matplotlib.colors as mcolors
-import matplotlib.font_manager as fm
+import matplotlib.lines as mlines
+import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 from cycler import cycler
 from matplotlib.axes import Axes
 from matplotlib.ticker import MultipleLocator
 
+from analysis.confidence import get_errorbar, wilson_interval
 from analysis.data_processing import get_enable_read_current
 
 # Color palettes
@@ -29,8 +32,23 @@ COLORS = [
 
 COLOR_CYCLER = cycler(color=COLORS)
 
+# Set once per process, figure modules call apply_snm_style() on import
+STYLE_STATE = {"applied": False, "font": None}
 
-def apply_snm_style():
+# Data artists with more points than the threshold are rasterised at this
+# resolution in vector output; axes, ticks and text stay vector
+RASTERIZE_POLICY = {
+    "enabled": True,
+    "threshold": 5000,
+    "dpi": 300,
+}
+
+
+def apply_snm_style(force: bool = False):
+    """Apply the paper style once per process, or again with ``force``."""
+    if STYLE_STATE["applied"] and not force:
+        return
+    STYLE_STATE["applied"] = True
     mpl.rcParams.update({
         "figure.figsize": [3.5, 3.5],
         "pdf.fonttype": 42,
@@ -64,7 +82,11 @@ def set_inter_font():
         font_path = None
 
     if font_path and os.path.exists(font_path):
-        fm.fontManager.addfont(font_path)
+        if STYLE_STATE["font"] != font_path:
+            import matplotlib.font_manager as fm
+
+            fm.fontManager.addfont(font_path)
+            STYLE_STATE["font"] = font_path
         mpl.rcParams["font.family"] = "Inter"
 
 
@@ -111,9 +133,15 @@ def add_dict_colorbar(
     cbar.set_label(label)
     return cbar
 
-def add_errorbar(ax: Axes, x: np.ndarray, y: np.ndarray, color=None) -> Axes:
-    n = len(y)
-    error = np.sqrt(y * (1 - y) / n)
+def add_errorbar(
+    ax: Axes, x: np.ndarray, y: np.ndarray, color=None, num_shots: int = None
+) -> Axes:
+    if num_shots is None:
+        n = len(y)
+        error = np.sqrt(y * (1 - y) / n)
+    else:
+        lower, upper = wilson_interval(y, num_shots)
+        error = get_errorbar(y, lower, upper)
     ax.errorbar(
         x,
         y,
@@ -142,3 +170,45 @@ def format_ber_axis(ax: Axes) -> Axes:
     ax.set_ylim(0, 1)
     ax.yaxis.set_major_locator(MultipleLocator(0.5))
     return ax
+
+def get_artist_num_points(artist) -> int:
+    if isinstance(artist, mlines.Line2D):
+        return len(artist.get_xdata())
+    if isinstance(artist, mcollections.Collection):
+        num_offsets = len(artist.get_offsets())
+        num_vertices = sum(len(path.vertices) for path in artist.get_paths())
+        return max(num_offsets, num_vertices)
+    if isinstance(artist, mpatches.Patch):
+        return len(artist.get_path().vertices)
+    return 0
+
+
+def apply_rasterization_policy(
+    fig: plt.Figure, threshold: int = None
+) -> list:
+    """Rasterise the dense data artists of a figure for vector output.
+
+    Lines, collections and patches with more than ``threshold`` points are
+    rasterised. An axes whose patches add up to more than ``threshold``
+    points, such as a histogram with many bars, has all of them rasterised.
+
+    Returns
+    -------
+    rasterized : list
+        The artists that were switched to rasterised drawing.
+    """
+    if not RASTERIZE_POLICY["enabled"]:
+        return []
+    threshold = RASTERIZE_POLICY["threshold"] if threshold is None else threshold
+
+    rasterized = []
+    for ax in fig.axes:
+        artists = [*ax.lines, *ax.collections, *ax.patches]
+        counts = [get_artist_num_points(artist) for artist in artists]
+        patch_total = sum(counts[len(ax.lines) + len(ax.collections):])
+        for artist, count in zip(artists, counts):
+            dense_patch = isinstance(artist, mpatches.Patch) and patch_total > threshold
+            if (count > threshold or dense_patch) and not artist.get_rasterized():
+                artist.set_rasterized(True)
+                rasterized.append(artist)
+    return rasterized
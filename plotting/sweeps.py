@@ -1,16 +1,16 @@
 from typing import Literal
 
+import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
 from matplotlib.ticker import MultipleLocator
 
-from analysis.calculations import (
-    filter_plateau,
-)
 from analysis.cell_utils import (
     convert_cell_to_coordinates,
 )
+from analysis.confidence import get_num_shots
 from analysis.constants import (
     IC0_C3,
     READ_XMAX,
@@ -21,15 +21,16 @@ from analysis.data_processing import (
     get_channel_temperature,
     get_current_cell,
     get_enable_current_sweep,
+    get_enable_fit,
     get_enable_read_current,
     get_enable_write_current,
-    get_fitting_points,
     get_read_currents,
     get_read_width,
     get_step_parameter,
     get_write_current,
     get_write_width,
 )
+from analysis.operating_window import build_family_array
 from plotting.arrays import build_array
 from plotting.helpers import (
     plot_fill_between_array,
@@ -37,6 +38,28 @@ from plotting.helpers import (
 )
 from plotting.style import CMAP, CMAP3, add_colorbar, add_errorbar
 
+# Axis labels of the step variable in heatmap mode
+FAMILY_LABELS = {
+    "write_current": "$I_{\mathrm{write}}$ [$\mu$A]",
+    "enable_write_current": "$I_{\mathrm{enable}}$ [$\mu$A]",
+    "enable_read_current": "$I_{\mathrm{enable}}$ [$\mu$A]",
+}
+
+
+def get_read_sweep_value(
+    data_dict: dict,
+    value_name: Literal["bit_error_rate", "write_0_read_1", "write_1_read_0"],
+) -> np.ndarray:
+    # Map value_name to corresponding data
+    value_mapping = {
+        "bit_error_rate": get_bit_error_rate,
+        "write_0_read_1": lambda d: d.get("write_0_read_1").flatten(),
+        "write_1_read_0": lambda d: d.get("write_1_read_0").flatten(),
+    }
+    if value_name not in value_mapping:
+        raise ValueError(f"Invalid value_name: {value_name}")
+    return value_mapping[value_name](data_dict)
+
 
 def plot_read_sweep(
     ax: Axes,
@@ -53,15 +76,7 @@ def plot_read_sweep(
     show_errorbar: bool = False,
     **kwargs,
 ) -> Axes:
-    # Map value_name to corresponding data
-    value_mapping = {
-        "bit_error_rate": get_bit_error_rate(data_dict),
-        "write_0_read_1": data_dict.get("write_0_read_1").flatten(),
-        "write_1_read_0": data_dict.get("write_1_read_0").flatten(),
-    }
-    value = value_mapping.get(value_name)
-    if value is None:
-        raise ValueError(f"Invalid value_name: {value_name}")
+    value = get_read_sweep_value(data_dict, value_name)
 
     # Map variable_name to corresponding data and label
     variable_mapping = {
@@ -89,7 +104,7 @@ def plot_read_sweep(
 
     # Add error bars if required
     if show_errorbar:
-        add_errorbar(ax, read_currents, value)
+        add_errorbar(ax, read_currents, value, num_shots=get_num_shots(data_dict))
     
     return ax
 
@@ -100,9 +115,17 @@ def plot_enable_write_sweep_multiple(
     show_colorbar: bool = True,
     show_errorbar: bool = False,
     range: slice = None,
+    heatmap: bool = False,
+    **kwargs,
 ) -> Axes:
     if range is not None:
         dict_list = dict_list[range]
+    if heatmap:
+        plot_sweep_family_map(
+            ax, dict_list, "write_current", show_colorbar=show_colorbar, **kwargs
+        )
+        ax.set_ylabel(FAMILY_LABELS["write_current"])
+        return ax
     write_current_list = []
 
     for data_dict in dict_list:
@@ -147,6 +170,7 @@ def plot_enable_sweep_single(
             enable_currents,
             bit_error_rate,
             color=kwargs.get("color", 'k'),
+            num_shots=get_num_shots(data_dict),
         )
     set_ber_ticks(ax)
 
@@ -311,6 +335,99 @@ def plot_write_sweep(ax: Axes, dict_list: str, show_colorbar:bool=False) -> Axes
 
 
 
+def plot_read_sweep_collection(
+    ax: Axes,
+    dict_list: list[dict],
+    value_name: Literal["bit_error_rate", "write_0_read_1", "write_1_read_0"],
+    colors: np.ndarray,
+    show_errorbar: bool = False,
+    **kwargs,
+) -> Axes:
+    """Draw a family of read sweeps as one LineCollection and one scatter.
+
+    Accepts the line and marker keyword arguments of ``ax.plot``. The
+    sweeps have no legend entries, label them with a colorbar instead.
+    """
+    segments = []
+    for data_dict in dict_list:
+        read_currents = get_read_currents(data_dict)
+        value = get_read_sweep_value(data_dict, value_name)
+        segments.append(np.column_stack([read_currents, value]))
+        if show_errorbar:
+            add_errorbar(ax, read_currents, value, num_shots=get_num_shots(data_dict))
+
+    linestyle = kwargs.get("linestyle", "-")
+    if linestyle not in ("", " ", "none", "None", None):
+        lines = LineCollection(
+            segments,
+            colors=colors,
+            linestyles=linestyle,
+            linewidths=kwargs.get("linewidth", plt.rcParams["lines.linewidth"]),
+            alpha=kwargs.get("alpha"),
+        )
+        ax.add_collection(lines)
+
+    marker = kwargs.get("marker")
+    if marker not in ("", " ", "none", "None", None):
+        markersize = kwargs.get("markersize", plt.rcParams["lines.markersize"])
+        ax.scatter(
+            np.concatenate([segment[:, 0] for segment in segments]),
+            np.concatenate([segment[:, 1] for segment in segments]),
+            c=np.repeat(colors, [len(segment) for segment in segments], axis=0),
+            s=markersize**2,
+            marker=marker,
+            alpha=kwargs.get("alpha"),
+            zorder=2,
+        )
+    ax.autoscale_view()
+    return ax
+
+
+def plot_sweep_family_map(
+    ax: Axes,
+    dict_list: list[dict],
+    variable_name: Literal[
+        "write_current",
+        "enable_write_current",
+        "enable_read_current",
+    ],
+    grid: np.ndarray = None,
+    show_contours: bool = False,
+    contour_levels: tuple = (0.45, 0.55),
+    show_colorbar: bool = False,
+    cmap=CMAP,
+) -> Axes:
+    """Draw a family of BER sweeps as one image.
+
+    The sweeps are resampled onto a common current grid and stacked by
+    their step value ``variable_name``. The colour scale is fixed to
+    BER 0-1 so maps of different families can be compared directly.
+    Regions outside a sweep's measured range are left blank.
+    """
+    x, y, z = build_family_array(dict_list, variable_name, grid)
+    mesh = ax.pcolormesh(
+        x,
+        y,
+        np.ma.masked_invalid(z),
+        cmap=cmap,
+        norm=mcolors.Normalize(vmin=0, vmax=1),
+        shading="nearest",
+    )
+    if show_contours and len(y) > 1:
+        ax.contour(
+            x,
+            y,
+            np.ma.masked_invalid(z),
+            levels=list(contour_levels),
+            colors="black",
+            linewidths=0.5,
+        )
+    if show_colorbar:
+        cbar = plt.colorbar(mesh, ax=ax, orientation="vertical", fraction=0.05, pad=0.05)
+        cbar.set_label("BER")
+    return ax
+
+
 def plot_read_sweep_array(
     ax: Axes,
     dict_list: list[dict],
@@ -318,21 +435,38 @@ def plot_read_sweep_array(
     variable_name: str,
     show_colorbar=None,
     show_errorbar=False,
+    batched=False,
+    heatmap=False,
     **kwargs,
 ) -> Axes:
+    if heatmap:
+        if value_name != "bit_error_rate":
+            raise ValueError(f"Heatmap mode only supports bit_error_rate, not {value_name}")
+        plot_sweep_family_map(
+            ax, dict_list, variable_name, show_colorbar=show_colorbar, **kwargs
+        )
+        ax.set_ylabel(FAMILY_LABELS[variable_name])
+        return ax
+
     colors = CMAP(np.linspace(0, 1, len(dict_list)))
-    variable_list = []
-    for i, data_dict in enumerate(dict_list):
-        plot_read_sweep(
-            ax,
-            data_dict,
-            value_name,
-            variable_name,
-            color=colors[i],
-            show_errorbar=show_errorbar,
-            **kwargs,
+    variable_list = [
+        data_dict[variable_name].flatten()[0] * 1e6 for data_dict in dict_list
+    ]
+    if batched:
+        plot_read_sweep_collection(
+            ax, dict_list, value_name, colors, show_errorbar=show_errorbar, **kwargs
         )
-        variable_list.append(data_dict[variable_name].flatten()[0] * 1e6)
+    else:
+        for i, data_dict in enumerate(dict_list):
+            plot_read_sweep(
+                ax,
+                data_dict,
+                value_name,
+                variable_name,
+                color=colors[i],
+                show_errorbar=show_errorbar,
+                **kwargs,
+            )
 
     if show_colorbar:
         add_colorbar(
@@ -354,18 +488,16 @@ def plot_enable_read_temp(ax: plt.Axes, enable_read_currents, read_temperatures)
         color="black",
         markersize=4,
     )
-    enable_read_currents = enable_read_currents[::-1]
-    read_temperatures = read_temperatures[::-1]
-    for i in range(len(read_temperatures)):
-        ax.plot(
-            enable_read_currents[i],
-            read_temperatures[i],
-            marker="o",
-            markersize=5,
-            markeredgecolor="black",
-            markerfacecolor=colors[i],
-            markeredgewidth=0.2,
-        )
+    ax.scatter(
+        enable_read_currents[::-1],
+        read_temperatures[::-1],
+        s=5**2,
+        c=colors,
+        marker="o",
+        edgecolors="black",
+        linewidths=0.2,
+        zorder=2,
+    )
 
     ax.set_xlabel("$I_{\mathrm{enable}}$ [$\mu$A]")
     ax.set_ylabel("$T_{\mathrm{read}}$ [K]")
@@ -407,15 +539,12 @@ def plot_row_or_column(axs, dict_list, is_row=True):
     for data_dict in dict_list:
         cell = get_current_cell(data_dict)
         column, row = convert_cell_to_coordinates(cell)
-        x = data_dict["x"][0]
-        y = data_dict["y"][0]
-        ztotal = data_dict["ztotal"]
-        xfit, yfit = get_fitting_points(x, y, ztotal)
+        fit = get_enable_fit(data_dict)
 
         index = column if is_row else row
         axs[index].plot(
-            xfit,
-            yfit,
+            fit["xfit"],
+            fit["yfit"],
             label=f"{cell}",
             color=colors[column],
             marker=markers[row],
@@ -435,10 +564,8 @@ def plot_grid(axs: Axes, dict_list: list[dict]) -> Axes:
         cell = get_current_cell(data_dict)
 
         column, row = convert_cell_to_coordinates(cell)
-        x = data_dict["x"][0]
-        y = data_dict["y"][0]
-        ztotal = data_dict["ztotal"]
-        xfit, yfit = get_fitting_points(x, y, ztotal)
+        fit = get_enable_fit(data_dict)
+        xfit, yfit = fit["xfit"], fit["yfit"]
         axs[row, column].plot(
             xfit,
             yfit,
@@ -446,11 +573,10 @@ def plot_grid(axs: Axes, dict_list: list[dict]) -> Axes:
             color=colors[column],
             marker=markers[row],
         )
-        y_step_size = y[1] - y[0]
         axs[row, column].errorbar(
             xfit,
             yfit,
-            yerr=y_step_size* np.ones_like(yfit),
+            yerr=fit["y_step"] * np.ones_like(yfit),
             fmt="o",
             color=colors[column],
             markeredgecolor="k",
@@ -461,12 +587,11 @@ def plot_grid(axs: Axes, dict_list: list[dict]) -> Axes:
             label="_data",
         )
 
-        xfit, yfit = filter_plateau(xfit, yfit, yfit[0] * 0.75)
-
         plot_linear_fit(
             axs[row, column],
-            xfit,
-            yfit,
+            fit["xfit_linear"],
+            fit["yfit_linear"],
+            coefficients=fit["coefficients"],
         )
         # plot_optimal_enable_currents(axs[row, column], data_dict)
         axs[row, column].legend(loc="upper right")
@@ -478,8 +603,14 @@ def plot_grid(axs: Axes, dict_list: list[dict]) -> Axes:
 
 
 
-def plot_linear_fit(ax: Axes, xfit: np.ndarray, yfit: np.ndarray, add_text:bool=False) -> Axes:
-    z = np.polyfit(xfit, yfit, 1)
+def plot_linear_fit(
+    ax: Axes,
+    xfit: np.ndarray,
+    yfit: np.ndarray,
+    add_text: bool = False,
+    coefficients: np.ndarray = None,
+) -> Axes:
+    z = np.polyfit(xfit, yfit, 1) if coefficients is None else coefficients
     p = np.poly1d(z)
     x_intercept = -z[1] / z[0]
     # ax.scatter(xfit, yfit, color="#08519C")
@@ -2,25 +2,94 @@ from typing import Literal
 
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
+from matplotlib.lines import Line2D
 
 from analysis.data_processing import (
     get_voltage_trace_data,
 )
+from analysis.decimation import decimate_pyramid, get_trace_pyramid
+from analysis.histogram import READ_VOLTAGE_KEYS, ShotHistogram
+from analysis.trace_averaging import RunningAverage
 from plotting.style import CMAP
 
 
+def get_pixel_width(ax: Axes) -> float:
+    """Width of an axes in pixels at the resolution of its figure."""
+    return ax.get_position().width * ax.figure.get_figwidth() * ax.figure.dpi
+
+
+class DecimatedLine(Line2D):
+    """Line that decimates its trace pyramid again for each draw.
+
+    The samples are chosen for the x limits and the pixel width of the
+    axes when drawn. ``savefig`` draws at the output dpi, so exports at any
+    dpi are resolved, and interactive zooms show the finer levels.
+    """
+
+    def __init__(self, pyramid: list, scale: float = 1.0, **kwargs):
+        super().__init__([], [], **kwargs)
+        self.pyramid = pyramid
+        self.scale = scale
+        self.view = None
+
+    def draw(self, renderer):
+        view = (self.axes.get_xlim(), self.axes.bbox.width)
+        # Only new data marks the line stale, so drawing never loops
+        if view != self.view:
+            self.view = view
+            x, y = decimate_pyramid(self.pyramid, view[0], view[1])
+            self.set_data(x, self.scale * y)
+        super().draw(renderer)
+
+
+def get_visible_trace(
+    ax: Axes, data_dict: dict, name: str, x, y, xlim: tuple = None
+) -> tuple:
+    """Min/max decimated samples of a trace for the visible window of ``ax``."""
+    pyramid = get_trace_pyramid(data_dict, name, x, y)
+    return decimate_pyramid(pyramid, xlim, get_pixel_width(ax))
+
+
+def plot_decimated(
+    ax: Axes,
+    data_dict: dict,
+    name: str,
+    x,
+    y,
+    xlim: tuple = None,
+    scale: float = 1.0,
+    **kwargs,
+) -> DecimatedLine:
+    """Plot a trace as a ``DecimatedLine``, scaled by ``scale``.
+
+    The line starts from the samples of ``get_visible_trace`` for ``xlim``,
+    so the axes autoscale to them as with ``ax.plot``.
+    """
+    pyramid = get_trace_pyramid(data_dict, name, x, y)
+    x, y = get_visible_trace(ax, data_dict, name, x, y, xlim)
+    (line,) = ax.plot(x, scale * y, **kwargs)
+    decimated = DecimatedLine(pyramid, scale)
+    decimated.update_from(line)
+    decimated.set_data(line.get_data())
+    decimated.set_zorder(line.get_zorder())
+    line.remove()
+    ax.add_line(decimated)
+    return decimated
+
+
 def plot_transient(
     ax: plt.Axes,
     data_dict: dict,
     cases=[0],
     signal_name: str = "tran_left_critical_current",
+    xlim: tuple = None,
     **kwargs,
 ) -> plt.Axes:
     for i in cases:
         data = data_dict[i]
-        time = data["time"]
-        signal = data[signal_name]
-        ax.plot(time, signal, **kwargs)
+        plot_decimated(
+            ax, data, signal_name, data["time"], data[signal_name], xlim, **kwargs
+        )
     ax.grid(True, which="both", linestyle="--", linewidth=0.5)
     return ax
 
@@ -82,7 +151,7 @@ def plot_transient_fill_branch(
     return ax
 
 
-def plot_case(ax, data_dict, case, signal_name="left", color=None):
+def plot_case(ax, data_dict, case, signal_name="left", color=None, xlim=None):
     if color is None:
         if signal_name == "left":
             color = "C0"
@@ -94,6 +163,7 @@ def plot_case(ax, data_dict, case, signal_name="left", color=None):
         data_dict,
         cases=[case],
         signal_name=f"tran_{signal_name}_critical_current",
+        xlim=xlim,
         linestyle="--",
         color=color,
         label=f"{signal_name.capitalize()} Critical Current",
@@ -103,6 +173,7 @@ def plot_case(ax, data_dict, case, signal_name="left", color=None):
         data_dict,
         cases=[case],
         signal_name="tran_left_branch_current",
+        xlim=xlim,
         color="C0",
         label="Left Branch Current",
     )
@@ -111,6 +182,7 @@ def plot_case(ax, data_dict, case, signal_name="left", color=None):
         data_dict,
         cases=[case],
         signal_name="tran_right_branch_current",
+        xlim=xlim,
         color="C1",
         label="Right Branch Current",
     )
@@ -146,20 +218,21 @@ def create_plot(
             sweep_param = sweep_param[case]
             sweep_param_list.append(sweep_param)
             ax: plt.Axes = axs[f"T{i}"]
-            plot_case(ax, data_dict, case, "left")
-            plot_case(ax, data_dict, case, "right")
-            ax.plot(
-                data_dict[case]["time"],
-                -1 * data_dict[case]["tran_left_critical_current"],
-                color="C0",
-                linestyle="--",
-            )
-            ax.plot(
-                data_dict[case]["time"],
-                -1 * data_dict[case]["tran_right_critical_current"],
-                color="C1",
-                linestyle="--",
-            )
+            plot_case(ax, data_dict, case, "left", xlim=time_window)
+            plot_case(ax, data_dict, case, "right", xlim=time_window)
+            for side, color in [("left", "C0"), ("right", "C1")]:
+                signal_name = f"tran_{side}_critical_current"
+                plot_decimated(
+                    ax,
+                    data_dict[case],
+                    signal_name,
+                    data_dict[case]["time"],
+                    data_dict[case][signal_name],
+                    time_window,
+                    scale=-1,
+                    color=color,
+                    linestyle="--",
+                )
             ax.set_ylim(-300, 900)
             ax.set_xlim(time_window)
             ax.yaxis.set_major_locator(plt.MultipleLocator(500))
@@ -176,7 +249,14 @@ def create_plot(
 
 
             ax: plt.Axes = axs[f"B{i}"]
-            plot_case_vout(ax, data_dict, case, "tran_output_voltage", color="k")
+            plot_case_vout(
+                ax,
+                data_dict,
+                case,
+                "tran_output_voltage",
+                xlim=time_window,
+                color="k",
+            )
             ax.set_ylim(-50e-3, 50e-3)
             ax.set_xlim(time_window)
             ax.axhline(0, color="black", linestyle="--", linewidth=0.5)
@@ -194,38 +274,48 @@ def create_plot(
 
 
 def plot_voltage_trace_averaged(
-    ax: Axes, data_dict: dict, trace_name: str, **kwargs
+    ax: Axes, data_dict: dict, trace_name: str, xlim: tuple = None, **kwargs
 ) -> Axes:
     x, y = get_voltage_trace_data(data_dict, trace_name)
-    ax.plot(
-        (x - x[0]),
-        y,
-        **kwargs,
+    plot_decimated(ax, data_dict, trace_name, x - x[0], y, xlim, **kwargs)
+    return ax
+
+
+def plot_trace_band(
+    ax: Axes, x, average: RunningAverage, num_std: float = 1.0, **kwargs
+) -> Axes:
+    """Mean of aligned shots with a band of ``num_std`` standard deviations."""
+    (line,) = ax.plot(x, average.mean, **kwargs)
+    band = num_std * average.std
+    ax.fill_between(
+        x,
+        average.mean - band,
+        average.mean + band,
+        color=line.get_color(),
+        alpha=0.3,
+        linewidth=0,
     )
     return ax
 
 
+def plot_shot_histogram(ax: Axes, histogram: ShotHistogram, **kwargs) -> Axes:
+    ax.stairs(histogram.counts, histogram.edges, fill=True, **kwargs)
+    return ax
+
+
 def plot_voltage_hist(ax: Axes, data_dict: dict) -> Axes:
-    ax.hist(
-        data_dict["read_zero_top"][0, :],
-        log=True,
-        range=(0.2, 0.6),
-        bins=100,
-        label="Read 0",
-        color="#1966ff",
-        alpha=0.5,
+    histograms = {
+        key: ShotHistogram.fixed((0.2, 0.6), bins=100).add(data_dict[key][0, :])
+        for key in READ_VOLTAGE_KEYS
+    }
+    plot_shot_histogram(
+        ax, histograms["read_zero_top"], label="Read 0", color="#1966ff", alpha=0.5
     )
-    ax.hist(
-        data_dict["read_one_top"][0, :],
-        log=True,
-        range=(0.2, 0.6),
-        bins=100,
-        label="Read 1",
-        color="#ff1423",
-        alpha=0.5,
+    plot_shot_histogram(
+        ax, histograms["read_one_top"], label="Read 1", color="#ff1423", alpha=0.5
     )
+    ax.set_yscale("log")
     ax.set_xlabel("Voltage [V]")
     ax.set_ylabel("Counts")
     ax.legend()
     return ax
-
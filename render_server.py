@@ -0,0 +1,260 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import matplotlib as mpl
+
+from analysis.file_utils import clear_data_cache, enable_data_cache
+from build_cache import get_data_files, get_imported_modules, get_module_path
+from plotting.panels import clear_panel_cache
+from plotting.render import RENDER_CONFIG, RENDER_FORMATS, configure_headless
+from run_all_scripts import FIGURE_SCRIPTS
+
+# Module-level state that must survive a reload of its module, the render
+# settings, the loaded data and the prepared panels
+STATEFUL_MODULES = {
+    "plotting.render": ["RENDER_CONFIG"],
+    "analysis.file_utils": ["DATA_CACHE"],
+    "plotting.panels": ["PANEL_CACHE"],
+}
+
+
+def reload_module(name: str) -> None:
+    """Reload a module, keeping the objects of its stateful globals.
+
+    Other modules and the server hold references to these objects, so the
+    originals are put back, with any keys new in the reloaded defaults.
+    """
+    module = sys.modules[name]
+    state = {attr: getattr(module, attr) for attr in STATEFUL_MODULES.get(name, [])}
+    importlib.reload(module)
+    for attr, value in state.items():
+        default = getattr(module, attr)
+        if isinstance(value, dict) and isinstance(default, dict):
+            for key, item in default.items():
+                value.setdefault(key, item)
+        setattr(module, attr, value)
+
+
+def get_data_signature(figure: str) -> Optional[tuple]:
+    """Modification time and size of every data file of a figure."""
+    try:
+        files = get_data_files(figure)
+    except FileNotFoundError:
+        return None
+    signature = []
+    for path in files:
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def get_reload_order(module_name: str) -> list[tuple[str, set[str]]]:
+    """Repository modules imported by a figure, dependencies first.
+
+    Each entry is a module name with the repository modules it imports.
+    """
+    order = []
+    seen = set()
+
+    def visit(name: str) -> None:
+        path = get_module_path(name)
+        if path is None or name in seen:
+            return
+        seen.add(name)
+        imports = {
+            dep
+            for dep in get_imported_modules(path, name)
+            if dep != name and get_module_path(dep) is not None
+        }
+        for dep in sorted(imports):
+            visit(dep)
+        order.append((name, imports))
+
+    visit(module_name)
+    return order
+
+
+class RenderServer:
+    """Render figures and panels in a warm process.
+
+    Imported modules, the matplotlib style, loaded data files and prepared
+    panel data stay in memory between requests. Modules whose source
+    changed are reloaded before the next render, so style tweaks take
+    effect without reloading the data.
+    """
+
+    def __init__(self):
+        enable_data_cache()
+        self.mtimes = {}
+        self.data_signatures = {}
+
+    def get_stale_modules(self, figure: str) -> list[str]:
+        stale = []
+        for name, imports in get_reload_order(figure):
+            mtime = os.path.getmtime(get_module_path(name))
+            changed = self.mtimes.get(name, mtime) != mtime
+            self.mtimes[name] = mtime
+            if changed or imports.intersection(stale):
+                stale.append(name)
+        return stale
+
+    def load_figure(self, figure: str):
+        if figure not in FIGURE_SCRIPTS:
+            raise ValueError(f"Unknown figure: {figure}")
+        stale = self.get_stale_modules(figure)
+        for name in stale:
+            if name in sys.modules:
+                reload_module(name)
+        # Prepared panel data depends on the figure and analysis code only
+        if any(name == figure or name.startswith("analysis") for name in stale):
+            clear_panel_cache(figure)
+        module = importlib.import_module(figure)
+        if self.data_changed(figure):
+            # Loaded dicts also hold values derived from the old data
+            clear_data_cache()
+            clear_panel_cache(figure)
+        return module
+
+    def data_changed(self, figure: str) -> bool:
+        """Whether any data file of the figure changed since the last check."""
+        signature = get_data_signature(figure)
+        changed = self.data_signatures.get(figure, signature) != signature
+        self.data_signatures[figure] = signature
+        return changed
+
+    def render(
+        self,
+        figure: str,
+        panel: Optional[str] = None,
+        formats: Optional[list[str]] = None,
+    ) -> dict:
+        start = time.perf_counter()
+        result = {"figure": figure, "panel": panel, "status": "ok", "error": None}
+        # Only the outputs of this render are kept, the server runs for long
+        RENDER_CONFIG["saved"].clear()
+        default_formats = RENDER_CONFIG["formats"]
+        try:
+            if formats is not None:
+                invalid = [fmt for fmt in formats if fmt not in RENDER_FORMATS]
+                if invalid:
+                    raise ValueError(f"Invalid formats: {invalid}")
+                RENDER_CONFIG["formats"] = formats
+            module = self.load_figure(figure)
+            if panel is not None and panel not in getattr(module, "PANELS", {}):
+                raise ValueError(f"{figure} has no panel {panel}")
+            # Figures change rcParams, keep each render independent
+            with mpl.rc_context():
+                if panel is None:
+                    module.main()
+                else:
+                    module.main(panel)
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["traceback"] = traceback.format_exc()
+        finally:
+            RENDER_CONFIG["formats"] = default_formats
+        result["wall_time"] = time.perf_counter() - start
+        result["outputs"] = list(RENDER_CONFIG["saved"])
+        RENDER_CONFIG["saved"].clear()
+        return result
+
+    def invalidate(self, figure: Optional[str] = None) -> dict:
+        """Drop cached data so the next render reloads it from disk."""
+        clear_data_cache()
+        clear_panel_cache(figure)
+        for name in [figure] if figure is not None else FIGURE_SCRIPTS:
+            sys.modules.pop(name, None)
+            self.mtimes.pop(name, None)
+            self.data_signatures.pop(name, None)
+        return {"status": "ok", "figure": figure}
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Local HTTP API of a RenderServer.
+
+    GET /render?figure=figure4&panel=delay&formats=png,svg
+    GET /invalidate?figure=figure4
+    GET /figures
+    """
+
+    server_version = "RenderServer/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        renderer = self.server.renderer
+        if url.path == "/render" and "figure" in query:
+            formats = query["formats"].split(",") if "formats" in query else None
+            result = renderer.render(query["figure"], query.get("panel"), formats)
+            self.send_json(200 if result["status"] == "ok" else 500, result)
+        elif url.path == "/invalidate":
+            self.send_json(200, renderer.invalidate(query.get("figure")))
+        elif url.path == "/figures":
+            panels = {}
+            for figure in FIGURE_SCRIPTS:
+                module = sys.modules.get(figure)
+                panels[figure] = list(getattr(module, "PANELS", {}))
+            self.send_json(200, panels)
+        else:
+            self.send_json(404, {"status": "error", "error": f"Not found: {self.path}"})
+
+    def send_json(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload, indent=2).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, preload: bool = True) -> None:
+    renderer = RenderServer()
+    if preload:
+        for figure in FIGURE_SCRIPTS:
+            try:
+                renderer.load_figure(figure)
+            except Exception as e:
+                print(f"Could not import {figure}: {e}")
+
+    # Single-threaded on purpose, matplotlib is not thread safe
+    httpd = HTTPServer((host, port), RenderRequestHandler)
+    httpd.renderer = renderer
+    print(f"Serving figures from {RENDER_CONFIG['output_dir']} on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve figure renders locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output-dir", default="figures")
+    parser.add_argument(
+        "--formats", nargs="+", default=["png"], choices=RENDER_FORMATS
+    )
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Import the figure modules on their first request instead.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_headless(args.output_dir, args.formats, args.dpi)
+    serve(args.host, args.port, preload=not args.no_preload)
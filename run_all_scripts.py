@@ -1,29 +1,346 @@
+import argparse
 import importlib
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from typing import Optional
 
+from build_cache import get_build_key, restore_outputs, store_outputs
+from plotting.render import RENDER_CONFIG, RENDER_FORMATS, configure_headless
 
-def run_all_figures():
-    # List of figure generation scripts (without .py extension)
-    figure_scripts = [
-        "figure1",
-        "figure2",
-        "figure3",
-        "figure4",
-        "sup_figure1",
-        "sup_figure2",
-        "sup_figure3",
-        "sup_figure4",
-    ]
-
-    for script in figure_scripts:
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# List of figure generation scripts (without .py extension)
+FIGURE_SCRIPTS = [
+    "figure1",
+    "figure2",
+    "figure3",
+    "figure4",
+    "sup_figure1",
+    "sup_figure2",
+    "sup_figure3",
+    "sup_figure4",
+]
+
+# Import time budgets in seconds on top of a bare interpreter start
+STARTUP_BUDGET = {
+    "run_all_scripts": 0.2,
+    "plotting.render": 0.1,
+    "analysis.file_utils": 0.2,
+    "analysis.data_processing": 0.3,
+}
+
+
+def run_all_figures(scripts: list[str] = FIGURE_SCRIPTS):
+    import matplotlib as mpl
+
+    for script in scripts:
         try:
             module = importlib.import_module(script)
             if hasattr(module, "main"):
                 print(f"Running {script}.main()...")
-                module.main()
+                # The style is applied once, keep per-figure rc changes local
+                with mpl.rc_context():
+                    module.main()
             else:
                 print(f"Skipping {script}: no main() function found.")
         except Exception as e:
             print(f"Error running {script}: {e}")
 
+
+def get_peak_memory_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
+
+
+def run_figure(script: str, render_config: dict, result_queue) -> None:
+    """Render one figure in a worker process and report its status."""
+    start = time.perf_counter()
+    configure_headless(
+        render_config["output_dir"],
+        render_config["formats"],
+        render_config["dpi"],
+        render_config["figure_dpi"],
+    )
+    result = {"figure": script, "status": "ok", "error": None}
+    try:
+        module = importlib.import_module(script)
+        if hasattr(module, "main"):
+            module.main()
+        else:
+            result["status"] = "skipped"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["wall_time"] = time.perf_counter() - start
+    result["peak_memory_mb"] = get_peak_memory_mb()
+    result["outputs"] = list(RENDER_CONFIG["saved"])
+    result_queue.put(result)
+
+
+def drain_results(
+    result_queue, results: dict, timeout: Optional[float] = None
+) -> None:
+    """Move every result waiting on the queue into ``results``.
+
+    Waits up to ``timeout`` seconds for each result, or not at all.
+    """
+    try:
+        while True:
+            if timeout is None:
+                result = result_queue.get_nowait()
+            else:
+                result = result_queue.get(timeout=timeout)
+            results[result["figure"]] = result
+    except queue.Empty:
+        pass
+
+
+def run_figures_parallel(
+    scripts: list[str] = FIGURE_SCRIPTS,
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> list[dict]:
+    """Render figures in isolated worker processes.
+
+    Each figure gets its own process, at most ``jobs`` at a time. A figure
+    that exceeds ``timeout`` seconds is terminated without stopping the
+    others, and a worker that dies without reporting is marked as crashed.
+
+    Returns
+    -------
+    results : list[dict]
+        One record per figure with its status, wall time and peak memory.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    render_config = dict(RENDER_CONFIG)
+
+    pending = list(scripts)
+    running = {}
+    results = {}
+    while pending or running:
+        while pending and len(running) < jobs:
+            script = pending.pop(0)
+            process = context.Process(
+                target=run_figure, args=(script, render_config, result_queue)
+            )
+            process.start()
+            running[script] = (process, time.perf_counter())
+
+        drain_results(result_queue, results, timeout=0.1)
+
+        for script, (process, start) in list(running.items()):
+            elapsed = time.perf_counter() - start
+            if script not in results and not process.is_alive():
+                # The worker may have reported just before exiting
+                process.join()
+                drain_results(result_queue, results)
+            if script in results:
+                process.join()
+                results[script]["total_time"] = elapsed
+            elif timeout is not None and elapsed > timeout:
+                process.terminate()
+                process.join()
+                results[script] = {
+                    "figure": script,
+                    "status": "timeout",
+                    "error": f"exceeded {timeout} s",
+                    "wall_time": elapsed,
+                    "total_time": elapsed,
+                    "peak_memory_mb": None,
+                }
+            elif not process.is_alive():
+                results[script] = {
+                    "figure": script,
+                    "status": "crashed",
+                    "error": f"exit code {process.exitcode}",
+                    "wall_time": elapsed,
+                    "total_time": elapsed,
+                    "peak_memory_mb": None,
+                }
+            else:
+                continue
+            del running[script]
+
+    return [results[script] for script in scripts]
+
+
+def run_figures_incremental(
+    scripts: list[str] = FIGURE_SCRIPTS,
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> list[dict]:
+    """Render only the figures whose code, data or settings changed.
+
+    Unchanged figures are restored from the local cache in ``build_cache``;
+    the others are rendered in worker processes and then cached.
+    """
+    keys = {}
+    for script in scripts:
+        try:
+            keys[script] = get_build_key(script, RENDER_CONFIG)
+        except FileNotFoundError as e:
+            # Without its data a figure is always rebuilt, and never cached
+            print(f"Rebuilding {script}: {e}")
+            keys[script] = None
+    results = {}
+    stale = []
+    for script in scripts:
+        outputs = None
+        if keys[script] is not None:
+            outputs = restore_outputs(script, keys[script], RENDER_CONFIG["output_dir"])
+        if outputs is None:
+            stale.append(script)
+            continue
+        results[script] = {
+            "figure": script,
+            "status": "cached",
+            "error": None,
+            "wall_time": 0.0,
+            "peak_memory_mb": None,
+            "outputs": outputs,
+        }
+
+    if stale:
+        for result in run_figures_parallel(stale, jobs, timeout):
+            if result["status"] == "ok" and keys[result["figure"]] is not None:
+                store_outputs(result["figure"], keys[result["figure"]], result["outputs"])
+            results[result["figure"]] = result
+
+    return [results[script] for script in scripts]
+
+
+def measure_startup(module_name: str, repeat: int = 5) -> float:
+    """Median time for a fresh interpreter to import a module, in seconds.
+
+    The time of a bare interpreter start is subtracted.
+    """
+
+    def run(code: str) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    return run(f"import {module_name}") - run("pass")
+
+
+def check_startup_budget(budget: dict = STARTUP_BUDGET) -> bool:
+    within_budget = True
+    for module_name, limit in budget.items():
+        elapsed = measure_startup(module_name)
+        status = "ok" if elapsed <= limit else "over"
+        within_budget &= elapsed <= limit
+        print(f"{module_name:<28} {elapsed:6.3f} s / {limit:.3f} s  {status}")
+    return within_budget
+
+
+def print_summary(results: list[dict]) -> None:
+    for result in results:
+        memory = result["peak_memory_mb"]
+        memory = f"{memory:8.1f} MB" if memory is not None else "       - MB"
+        line = f"{result['figure']:<12} {result['status']:<8} {result['wall_time']:7.2f} s {memory}"
+        if result["error"]:
+            line += f"  {result['error']}"
+        print(line)
+
+
+def parse_figure_dpi(values: list[str]) -> dict:
+    figure_dpi = {}
+    for value in values:
+        name, dpi = value.split("=")
+        figure_dpi[name] = int(dpi)
+    return figure_dpi
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render all figures.")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Save figures with the Agg backend instead of showing them.",
+    )
+    parser.add_argument("--output-dir", default="figures")
+    parser.add_argument(
+        "--formats", nargs="+", default=["png"], choices=RENDER_FORMATS
+    )
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument(
+        "--figure-dpi",
+        nargs="*",
+        default=[],
+        metavar="NAME=DPI",
+        help="Per-figure resolution, e.g. figure1_histogram=600.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Render the figures headless in this many worker processes.",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Per-figure time limit in s."
+    )
+    parser.add_argument(
+        "--report", default=None, help="Write the per-figure results as JSON."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip figures whose code, data and settings are unchanged.",
+    )
+    parser.add_argument(
+        "--check-startup",
+        action="store_true",
+        help="Measure module import times against STARTUP_BUDGET and exit.",
+    )
+    parser.add_argument("figures", nargs="*", default=FIGURE_SCRIPTS)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    run_all_figures()
+    args = parse_args()
+    if args.check_startup:
+        sys.exit(0 if check_startup_budget() else 1)
+    parallel = args.jobs is not None or args.timeout is not None or args.incremental
+    if args.headless or parallel:
+        configure_headless(
+            args.output_dir,
+            args.formats,
+            args.dpi,
+            parse_figure_dpi(args.figure_dpi),
+        )
+    if not parallel:
+        run_all_figures(args.figures)
+        sys.exit(0)
+
+    if args.incremental:
+        results = run_figures_incremental(args.figures, args.jobs, args.timeout)
+    else:
+        results = run_figures_parallel(args.figures, args.jobs, args.timeout)
+    print_summary(results)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(
+        0 if all(r["status"] in ("ok", "skipped", "cached") for r in results) else 1
+    )
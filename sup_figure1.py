@@ -1,13 +1,22 @@
 import matplotlib.pyplot as plt
 
-from analysis.file_utils import import_directory
+from analysis.file_utils import load_data_inputs
+from plotting.render import finalize_figure
 from plotting.style import apply_snm_style, set_figsize_max
 from plotting.sweeps import plot_full_grid
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "enable_response": {
+        "path": "data/sup_figure1/",
+        "keys": ["x", "y", "ztotal", "cell"],
+    },
+}
+
+
 def main():
-    dict_list = import_directory("data/sup_figure1/")
+    dict_list = load_data_inputs(DATA_INPUTS)["enable_response"]
 
     fig, axs = plt.subplots(
         nrows=5, ncols=5, 
@@ -15,7 +24,7 @@ def main():
         sharex=True, sharey=True
     )
     plot_full_grid(axs, dict_list)
-    plt.show()
+    finalize_figure(fig, "sup_figure1")
 
 if __name__ == "__main__":
     main()
@@ -5,8 +5,10 @@ from analysis.data_processing import (
     get_channel_temperature,
 )
 from analysis.file_utils import (
-    import_directory,
+    SWEEP_KEYS,
+    load_data_inputs,
 )
+from plotting.render import finalize_figure
 from plotting.style import add_dict_colorbar, apply_snm_style, set_figsize_wide
 from plotting.sweeps import (
     plot_fill_between_array,
@@ -15,11 +17,18 @@ from plotting.sweeps import (
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "enable_read_290": {"path": "data/figure2/data_290uA", "keys": SWEEP_KEYS},
+    "enable_read_300": {"path": "data/figure2/data_300uA", "keys": SWEEP_KEYS},
+    "enable_read_310": {"path": "data/figure2/data_310uA", "keys": SWEEP_KEYS},
+}
+
 
 def main():
-    enable_read_290_list = import_directory("data/figure2/data_290uA")
-    enable_read_300_list = import_directory("data/figure2/data_300uA")
-    enable_read_310_list = import_directory("data/figure2/data_310uA")
+    data = load_data_inputs(DATA_INPUTS)
+    enable_read_290_list = data["enable_read_290"]
+    enable_read_300_list = data["enable_read_300"]
+    enable_read_310_list = data["enable_read_310"]
 
 
     dict_list = [enable_read_290_list, enable_read_300_list, enable_read_310_list]
@@ -48,7 +57,7 @@ def main():
     cbar.ax.set_position([axpos.x1 + 0.02, axpos.y0, 0.01, axpos.y1 - axpos.y0])
     cbar.set_ticks([150, 160, 170, 180, 190, 200, 210, 220, 230, 240, 250])
 
-    plt.show()
+    finalize_figure(fig, "sup_figure2")
 
 
 if __name__ == "__main__":
@@ -6,12 +6,19 @@ from analysis.data_processing import (
     get_channel_temperature,
     get_enable_read_current,
 )
-from analysis.file_utils import import_directory
+from analysis.file_utils import SWEEP_KEYS, load_data_inputs
+from plotting.render import finalize_figure
 from plotting.style import add_dict_colorbar, apply_snm_style, set_figsize_wide
 from plotting.sweeps import plot_read_sweep_array
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "C3": {"path": "data/sup_figure3/write_current_sweep_C3", "keys": SWEEP_KEYS},
+    "C3_3": {"path": "data/sup_figure3/write_current_sweep_C3_3", "keys": SWEEP_KEYS},
+    "C3_4": {"path": "data/sup_figure3/write_current_sweep_C3_4", "keys": SWEEP_KEYS},
+}
+
 
 def main():
     fig = plt.figure(figsize=set_figsize_wide())
@@ -19,11 +26,8 @@ def main():
 
     axs = [fig.add_subplot(gs[i]) for i in range(3)]
     cax = fig.add_subplot(gs[3])  # Dedicated colorbar axis
-    dict_list = [
-        import_directory("data/sup_figure3/write_current_sweep_C3"),
-        import_directory("data/sup_figure3/write_current_sweep_C3_3"),
-        import_directory("data/sup_figure3/write_current_sweep_C3_4"),
-    ]
+    data = load_data_inputs(DATA_INPUTS)
+    dict_list = [data["C3"], data["C3_3"], data["C3_4"]]
 
     for i, data_dict in enumerate(dict_list):
         enable_temperature = get_channel_temperature(data_dict[0], "read")
@@ -48,7 +52,7 @@ def main():
     cbar = add_dict_colorbar(axs[2], dict_list, "write_current", cax=cax)
     cbar.ax.set_position([axpos.x1 + 0.02, axpos.y0, 0.01, axpos.y1 - axpos.y0])
 
-    plt.show()
+    finalize_figure(fig, "sup_figure3")
 
 
 def plot_read_sweep_import(data_dict: dict[str, list[float]]):
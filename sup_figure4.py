@@ -2,19 +2,25 @@ import os
 
 import matplotlib.pyplot as plt
 
-from analysis.file_utils import import_directory
+from analysis.file_utils import SWEEP_KEYS, load_data_inputs
+from plotting.render import finalize_figure
 from plotting.style import apply_snm_style, set_figsize_wide
 from plotting.sweeps import plot_enable_write_sweep_multiple
 
 apply_snm_style()
 
+DATA_INPUTS = {
+    "enable_write_sweep": {
+        "path": os.path.join(os.path.dirname(__file__), "data/figure4/data"),
+        "keys": SWEEP_KEYS,
+    },
+}
+
 
 def main():
     fig, axs = plt.subplot_mosaic("BC", figsize=set_figsize_wide())
 
-    dict_list = import_directory(
-        os.path.join(os.path.dirname(__file__), "data/figure4/data")
-    )
+    dict_list = load_data_inputs(DATA_INPUTS)["enable_write_sweep"]
     sort_dict_list = sorted(
         dict_list, key=lambda x: x.get("write_current").flatten()[0]
     )
@@ -34,7 +40,7 @@ def main():
     axs["B"].set_xlabel("Enable Write Current [$\mu$A]")
     axs["C"].set_xlabel("Enable Write Current [$\mu$A]")
     axs["B"].set_ylabel("Bit Error Rate")
-    plt.show()
+    finalize_figure(fig, "sup_figure4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pytest
+from scipy.special import ndtr
+
+from analysis.ber_estimation import (
+    estimate_directory,
+    estimate_tail_ber,
+    get_extrapolation_floor,
+)
+from analysis.threshold_search import search_optimal_threshold
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUM_SHOTS = 20000
+
+
+def gaussian_shots(mean0, mean1, sigma=1.0, num_points=1, seed=0):
+    rng = np.random.default_rng(seed)
+    read_zero = rng.normal(mean0, sigma, (num_points, NUM_SHOTS))
+    read_one = rng.normal(mean1, sigma, (num_points, NUM_SHOTS))
+    return read_zero, read_one
+
+
+def test_gaussian_tails_are_extrapolated():
+    read_zero, read_one = gaussian_shots(0.0, 7.0)
+    estimate = estimate_tail_ber(read_zero, read_one, num_bootstrap=0)
+    assert estimate["consistent"].all()
+    assert estimate["bit_error_rate"][0] == pytest.approx(ndtr(-3.5), rel=1.0)
+
+
+def test_inverted_polarity_mirrors_the_estimate():
+    read_zero, read_one = gaussian_shots(0.0, 5.0)
+    normal = estimate_tail_ber(read_zero, read_one, num_bootstrap=0)
+    inverted = estimate_tail_ber(-read_zero, -read_one, True, num_bootstrap=0)
+    assert inverted["consistent"].all()
+    np.testing.assert_allclose(
+        inverted["bit_error_rate"], normal["bit_error_rate"], rtol=1e-6
+    )
+
+
+def test_inconsistent_fit_falls_back_to_the_empirical_optimum():
+    # Read 0 has a second mode above read 1, the tails are not Gaussian
+    read_zero, read_one = gaussian_shots(0.0, 5.0)
+    read_zero[:, : NUM_SHOTS // 4] += 10.0
+    estimate = estimate_tail_ber(read_zero, read_one, num_bootstrap=0)
+    optimum = search_optimal_threshold(read_zero, read_one)
+    assert not estimate["consistent"].any()
+    np.testing.assert_allclose(estimate["bit_error_rate"], optimum["bit_error_rate"])
+    assert (estimate["bit_error_rate"] <= 0.5).all()
+
+
+def test_wrong_polarity_never_exceeds_one_half():
+    read_zero, read_one = gaussian_shots(0.0, 5.0)
+    estimate = estimate_tail_ber(read_zero, read_one, True, num_bootstrap=0)
+    assert not estimate["consistent"].any()
+    assert (estimate["bit_error_rate"] <= 0.5).all()
+    assert (estimate["upper"] <= 0.5).all()
+
+
+def test_extrapolation_is_clipped_to_the_floor():
+    read_zero, read_one = gaussian_shots(0.0, 40.0)
+    estimate = estimate_tail_ber(read_zero, read_one, num_bootstrap=20, seed=0)
+    floor = get_extrapolation_floor(2 * NUM_SHOTS)
+    assert not estimate["resolved"].any()
+    assert (estimate["bit_error_rate"] == floor).all()
+    assert (estimate["lower"] >= floor).all()
+
+
+@pytest.mark.parametrize(
+    "directory, file, point, expected",
+    [
+        # Measured with inverted counting polarity
+        ("data/figure4/data", 1, 10, 0.214),
+        # Inverting operation, the stored rate is 0.946
+        ("data/figure2/data_290uA", 3, 9, 0.051),
+    ],
+)
+def test_stored_sweeps_use_the_readout_polarity(directory, file, point, expected):
+    directory = os.path.join(ROOT, directory)
+    if not os.path.isdir(directory):
+        pytest.skip(f"{directory} not found")
+    estimate = estimate_directory(directory, num_bootstrap=0)[file]
+    assert estimate["bit_error_rate"][point] == pytest.approx(expected, abs=0.01)
+    assert (estimate["bit_error_rate"] <= 0.5).all()
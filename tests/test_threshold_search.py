@@ -0,0 +1,21 @@
+import numpy as np
+
+from analysis.threshold_search import get_error_curve, search_optimal_threshold
+
+
+def test_threshold_is_the_middle_of_the_first_optimal_gap():
+    # Thresholds in (0, 1) and (2, 3) both miss one read 1 shot
+    read_zero = np.array([[0.0, 2.0]])
+    read_one = np.array([[1.0, 3.0]])
+    result = search_optimal_threshold(read_zero, read_one)
+    assert result["threshold"][0] == 0.5
+    assert result["bit_error_rate"][0] == 0.25
+
+
+def test_error_count_matches_the_curve_minimum():
+    rng = np.random.default_rng(0)
+    read_zero = rng.integers(0, 6, (200, 4)).astype(float)
+    read_one = rng.integers(2, 9, (200, 4)).astype(float)
+    _, curve = get_error_curve(read_zero, read_one)
+    result = search_optimal_threshold(read_zero, read_one)
+    np.testing.assert_allclose(result["bit_error_rate"], curve.min(axis=-1))